@@ -13,9 +13,37 @@ class Settings(BaseSettings):
     # Authentication
     ADMIN_USERNAME: str
     ADMIN_PASSWORD: str
+    ADMIN_PASSWORD_HASH: Optional[str] = None  # bcrypt hash to check against instead of hashing ADMIN_PASSWORD at startup
+    LOGIN_MAX_CONCURRENT_HASHES: int = 2  # bcrypt checks running at once, further logins wait their turn
+    # Clients are told apart by request.client.host. Behind a reverse proxy that is the proxy's
+    # address for everyone, so one client guessing passwords locks the admin out too; run uvicorn
+    # with --proxy-headers and --forwarded-allow-ips so it reports the real client address.
+    LOGIN_RATE_LIMIT_ATTEMPTS: int = 10  # login attempts per client per window
+    LOGIN_RATE_LIMIT_WINDOW: int = 300
+    LOGIN_RATE_LIMIT_MAX_CLIENTS: int = 10000  # clients tracked at once, the least recently seen is forgotten first
+    
+    # Login sessions: "memory" for a single process, "sqlite" to share them between workers and restarts
+    SESSION_BACKEND: str = "memory"
+    SESSION_DATABASE_PATH: str = "./data/sessions.db"
+    SESSION_TTL: int = 86400  # seconds a session stays valid after login
+    SESSION_SWEEP_INTERVAL: float = 60.0  # seconds between removals of expired sessions
+    SESSION_CACHE_TTL: float = 5.0  # seconds a sqlite-backed session is served from memory, so a logout elsewhere takes this long to apply here
     
     # Database
     DATABASE_URL: str = "sqlite:///./data/grabarr.db"
+    DB_THREADS: int = 4  # threads that run SQLAlchemy calls off the event loop
+    DB_POOL_SIZE: int = 5  # connections kept open, at least DB_THREADS
+    DB_POOL_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_STATEMENT_CACHE_SIZE: int = 256  # prepared statements kept per SQLite connection
+    
+    # SQLite connection pragmas
+    SQLITE_JOURNAL_MODE: str = "WAL"  # readers no longer block on a writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # durable across app crashes, fsync only at checkpoints in WAL mode
+    SQLITE_BUSY_TIMEOUT: int = 5000  # milliseconds to wait for the write lock before failing
+    SQLITE_CACHE_SIZE: int = 16384  # page cache per connection, KiB
+    SQLITE_MMAP_SIZE: int = 268435456  # bytes of the database file read through mmap, 0 disables
+    SQLITE_TEMP_STORE: str = "MEMORY"
     
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3456"]
@@ -24,6 +52,70 @@ class Settings(BaseSettings):
     SONARR_API_KEY: Optional[str] = None
     SONARR_BASE_URL: Optional[str] = None
     
+    # Sonarr HTTP client pool
+    SONARR_POOL_MAX_CONNECTIONS: int = 20
+    SONARR_POOL_MAX_KEEPALIVE: int = 10
+    SONARR_POOL_KEEPALIVE_EXPIRY: float = 60.0
+    SONARR_TIMEOUT: float = 30.0
+    SONARR_CONNECT_TIMEOUT: float = 5.0
+    SONARR_HTTP2: bool = False  # requires the h2 package (httpx[http2])
+    
+    SONARR_FETCH_CONCURRENCY: int = 8  # parallel requests for bulk episode scans
+    
+    # Sonarr read cache
+    SONARR_CACHE_TTL: float = 60.0  # seconds a series/episode list is served without refreshing
+    SONARR_CACHE_STALE_TTL: float = 600.0  # extra seconds a stale list is served while it refreshes
+    SONARR_CACHE_MAX_ENTRIES: int = 2000
+    SONARR_CACHE_MAX_BODY_BYTES: int = 32 * 1024 * 1024  # larger proxied bodies are streamed but not cached
+    
+    # Circuit breaker around each Sonarr instance
+    SONARR_CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failures before calls fail fast
+    SONARR_CIRCUIT_RESET_TIMEOUT: float = 30.0  # seconds an open circuit waits before a trial call
+    
+    # Instance health monitor
+    HEALTH_CHECK_INTERVAL: int = 60  # seconds between background probes of every active instance, 0 disables them
+    HEALTH_CHECK_TIMEOUT: float = 10.0
+    
+    # Local library mirror
+    LIBRARY_SYNC_INTERVAL: int = 900  # seconds between delta syncs, 0 disables the background sync
+    LIBRARY_SYNC_BATCH_SIZE: int = 50  # series whose episodes are committed together, so an interrupted sync keeps its progress
+    
+    # Search workers
+    SEARCH_WORKERS: int = 4
+    SEARCH_WORKERS_PER_INSTANCE: int = 2  # starting concurrency per instance, adapted between the bounds below
+    SEARCH_CONCURRENCY_MIN: int = 1
+    SEARCH_CONCURRENCY_MAX: int = 16  # also bounded by SEARCH_WORKERS
+    SEARCH_LATENCY_TARGET: float = 2.0  # seconds; faster commands let an instance's concurrency grow
+    SEARCH_BATCH_SIZE: int = 50  # max episodes per EpisodeSearch command
+    SEARCH_BATCH_WINDOW: float = 0.25  # seconds to wait for more jobs to coalesce
+    
+    # Search retries, failed jobs are rescheduled with exponential backoff then dead-lettered
+    SEARCH_RETRY_MAX: int = 5
+    SEARCH_RETRY_INITIAL_DELAY: float = 30.0
+    SEARCH_RETRY_MAX_DELAY: float = 3600.0
+    SEARCH_RETRY_BACKOFF: float = 2.0
+    
+    # Queue backend: "memory" for a single process, "sqlite" to share one queue between uvicorn workers
+    QUEUE_BACKEND: str = "memory"
+    QUEUE_DATABASE_PATH: str = "./data/queue.db"
+    QUEUE_VISIBILITY_TIMEOUT: float = 120.0  # seconds a claimed job stays leased without a heartbeat
+    QUEUE_POLL_INTERVAL: float = 0.5  # seconds between checks for jobs added by other processes
+    
+    # Queue journal, lets the memory backend survive restarts; empty QUEUE_JOURNAL_DIR disables it
+    QUEUE_JOURNAL_DIR: str = "./data/journal"
+    QUEUE_JOURNAL_FLUSH_INTERVAL: float = 0.05  # seconds between group commits, the most a crash can lose
+    QUEUE_SNAPSHOT_EVERY: int = 100000  # journal records between snapshots
+    
+    # Several uvicorn workers; uvicorn also reads WEB_CONCURRENCY as the default for --workers
+    WEB_CONCURRENCY: int = 1  # processes running searches, each gets an equal share of every instance's rate limit
+    LEASE_TTL: float = 30.0  # seconds before the periodic tasks of a process that died move to another one
+    
+    # Job history
+    JOB_HISTORY_MAX_JOBS: int = 10000  # finished jobs kept in memory
+    JOB_HISTORY_MAX_AGE: int = 86400  # seconds before a finished job is archived
+    DEAD_LETTER_MAX_JOBS: int = 1000  # dead-lettered jobs kept for requeueing, older ones are archived
+    DEAD_LETTER_MAX_AGE: int = 604800  # seconds a job stays dead-lettered before it is archived
+    
     # Rate Limiting
     RATE_LIM_WINDOW: int = 300  # 5 minutes
     MAX_REQUESTS_PER_WINDOW: int = 100
@@ -1,4 +1,8 @@
 # Standard library imports
+import asyncio
+import hmac
+import math
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 # Third-party imports
@@ -9,30 +13,74 @@ from passlib.context import CryptContext
 # Local application imports
 from app.config import settings
 from app.core.session import get_session, delete_session, create_session
+from app.utils.rate_limit import RateLimiter
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+login_limiter = RateLimiter(
+    settings.LOGIN_RATE_LIMIT_ATTEMPTS,
+    settings.LOGIN_RATE_LIMIT_WINDOW,
+    max_keys=settings.LOGIN_RATE_LIMIT_MAX_CLIENTS
+)
+_admin_hash: Optional[str] = settings.ADMIN_PASSWORD_HASH
+# bcrypt gets its own threads so a login burst can't take the default executor from other work;
+# the bcrypt package releases the GIL while hashing, so the event loop keeps running meanwhile
+_hash_executor = ThreadPoolExecutor(max_workers=settings.LOGIN_MAX_CONCURRENT_HASHES, thread_name_prefix="bcrypt")
+# Created on first use so it binds to the running event loop
+_hash_gate: Optional[asyncio.Semaphore] = None
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def _run_hash(fn, *args):
+    global _hash_gate
+    if _hash_gate is None:
+        _hash_gate = asyncio.Semaphore(settings.LOGIN_MAX_CONCURRENT_HASHES)
+    async with _hash_gate:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+
+async def prepare_admin_hash() -> None:
+    """Hash the admin password once, off the event loop, so logins only pay for the check"""
+    global _admin_hash
+    if _admin_hash is None:
+        _admin_hash = await _run_hash(get_password_hash, settings.ADMIN_PASSWORD)
+
 async def authenticate_user(username: str, password: str) -> bool:
     """Authenticate user against admin credentials"""
-    if username != settings.ADMIN_USERNAME:
-        return False
-    return verify_password(password, get_password_hash(settings.ADMIN_PASSWORD))
+    await prepare_admin_hash()
+    username_ok = hmac.compare_digest(username.encode(), settings.ADMIN_USERNAME.encode())
+    # bcrypt runs for unknown usernames too, so response time doesn't reveal which usernames exist
+    password_ok = await _run_hash(verify_password, password, _admin_hash)
+    return username_ok and password_ok
+
+def _throttle_login(client: Optional[str]) -> None:
+    bucket = login_limiter.bucket(client or "unknown")
+    if not bucket.try_acquire():
+        retry_after = math.ceil((1 - bucket.fill()) / bucket.rate)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+async def login(username: str, password: str, client: Optional[str] = None) -> str:
+    """Login user and return session ID
 
-async def login(username: str, password: str) -> str:
-    """Login user and return session ID"""
+    Each client (by address) gets LOGIN_RATE_LIMIT_ATTEMPTS attempts per
+    LOGIN_RATE_LIMIT_WINDOW seconds; beyond that it is refused with 429 before
+    any hashing is done.
+    """
+    _throttle_login(client)
     if not await authenticate_user(username, password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return create_session(username)
+    return await create_session(username)
 
 async def get_current_user(session_id: str = Cookie(None)) -> str:
     """Get current user from session cookie"""
@@ -43,17 +91,17 @@ async def get_current_user(session_id: str = Cookie(None)) -> str:
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    username = get_session(session_id)
-    if not username:
+    session = await get_session(session_id)
+    if not session:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid session",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return username
+    return session["username"]
 
 async def logout(session_id: str = Cookie(None)) -> None:
     """Logout user by deleting their session"""
     if session_id:
-        delete_session(session_id) 
\ No newline at end of file
+        await delete_session(session_id) 
\ No newline at end of file
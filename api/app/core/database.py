@@ -1,27 +1,128 @@
 # Standard library imports
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
 
 # Third-party imports
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 
-# Create data directory if it doesn't exist
-os.makedirs("data", exist_ok=True)
+# Local application imports
+from app.config import settings
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./data/grabarr.db"
+T = TypeVar("T")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+def sqlite_pragmas() -> Dict[str, Any]:
+    """Pragmas applied to every new SQLite connection, from the SQLITE_* settings"""
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+        "cache_size": -settings.SQLITE_CACHE_SIZE,  # negative means KiB rather than pages
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": settings.SQLITE_TEMP_STORE
+    }
+
+def is_memory_database(url: str) -> bool:
+    """Whether `url` is an in-memory SQLite database, which exists only inside its one connection"""
+    database_url = make_url(url)
+    return database_url.get_backend_name() == "sqlite" and database_url.database in (None, "", ":memory:")
+
+def create_db_engine(url: str, pragmas: Optional[Dict[str, Any]] = None) -> Engine:
+    """Engine with a pool sized for the database threads; SQLite connections get `pragmas` on connect"""
+    pool_args = {
+        "pool_size": max(settings.DB_POOL_SIZE, settings.DB_THREADS),
+        "max_overflow": settings.DB_POOL_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT
+    }
+    database_url = make_url(url)
+    if database_url.get_backend_name() != "sqlite":
+        return create_engine(url, pool_pre_ping=True, **pool_args)
+
+    connect_args = {
+        "check_same_thread": False,  # connections move between the database threads
+        "cached_statements": settings.DB_STATEMENT_CACHE_SIZE
+    }
+    if is_memory_database(url):
+        # Every connection to :memory: is a separate database, so share a single one; callers
+        # must not use it from two threads at once, see the database executor below
+        engine = create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(database_url.database)), exist_ok=True)
+        engine = create_engine(url, connect_args=connect_args, poolclass=QueuePool, **pool_args)
+
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    return engine
+
+engine = create_db_engine(settings.DATABASE_URL)
+# Objects stay loaded after commit, so reading them on the event loop never triggers a lazy refresh query
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# SQLAlchemy calls block, so async code runs them on these threads instead of the event loop.
+# An in-memory database is one shared connection, so its calls are serialized on a single thread.
+_executor = ThreadPoolExecutor(
+    max_workers=1 if is_memory_database(settings.DATABASE_URL) else settings.DB_THREADS,
+    thread_name_prefix="db"
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
+async def get_db() -> AsyncIterator[Session]:
+    # Closed on the database threads too, a sync dependency would close it on FastAPI's threadpool
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        await run_db(db.close)
+
+async def run_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run blocking database work on the database thread pool and wait for the result
+
+    A session may be handed between threads this way as long as only one call
+    uses it at a time, which awaiting each call in turn guarantees.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+
+@asynccontextmanager
+async def db_session() -> AsyncIterator[Session]:
+    """Session for async code outside request dependencies; use it through run_db"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_db(db.close)
+
+def add_missing_columns() -> None:
+    """Add nullable model columns that existing tables do not have yet
+
+    create_all only creates missing tables, so databases created by an older
+    version would otherwise fail on columns added to a model since.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
@@ -0,0 +1,90 @@
+# Standard library imports
+import asyncio
+from typing import Dict, Optional, Tuple
+
+# Third-party imports
+import httpx
+
+# Local application imports
+from app.config import settings
+
+def _build_client(base_url: str = "", api_key: Optional[str] = None) -> httpx.AsyncClient:
+    headers = {"X-Api-Key": api_key} if api_key else None
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        http2=settings.SONARR_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.SONARR_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SONARR_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SONARR_POOL_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.SONARR_TIMEOUT,
+            connect=settings.SONARR_CONNECT_TIMEOUT,
+        ),
+    )
+
+class SonarrClientRegistry:
+    """Keeps one pooled keep-alive HTTP client per Sonarr instance"""
+
+    def __init__(self):
+        self._clients: Dict[int, Tuple[Tuple[str, str], httpx.AsyncClient]] = {}
+        self._shared_client: Optional[httpx.AsyncClient] = None
+        self._retired: Dict[asyncio.Task, httpx.AsyncClient] = {}  # delayed close -> client it closes
+
+    def get(self, instance_id: int, base_url: str, api_key: str) -> httpx.AsyncClient:
+        """Return the pooled client for an instance, rebuilding it if its URL or API key changed"""
+        fingerprint = (base_url.rstrip("/"), api_key)
+        entry = self._clients.get(instance_id)
+        if entry is not None:
+            if entry[0] == fingerprint and not entry[1].is_closed:
+                return entry[1]
+            self._retire(entry[1])
+
+        client = _build_client(fingerprint[0], api_key)
+        self._clients[instance_id] = (fingerprint, client)
+        return client
+
+    def get_shared_client(self) -> httpx.AsyncClient:
+        """Pooled client for requests that are not tied to a registered instance"""
+        if self._shared_client is None or self._shared_client.is_closed:
+            self._shared_client = _build_client()
+        return self._shared_client
+
+    def invalidate(self, instance_id: int) -> None:
+        """Drop the client for an instance so the next call rebuilds it"""
+        entry = self._clients.pop(instance_id, None)
+        if entry is not None:
+            self._retire(entry[1])
+
+    def _retire(self, client: httpx.AsyncClient) -> None:
+        # Requests already running on the old client keep going, so close it only once they
+        # have had their connect and response timeouts to finish
+        try:
+            task = asyncio.get_running_loop().create_task(self._close_later(client))
+        except RuntimeError:
+            return
+        self._retired[task] = client
+        task.add_done_callback(lambda done: self._retired.pop(done, None))
+
+    @staticmethod
+    async def _close_later(client: httpx.AsyncClient) -> None:
+        await asyncio.sleep(settings.SONARR_CONNECT_TIMEOUT + settings.SONARR_TIMEOUT)
+        await client.aclose()
+
+    async def aclose(self) -> None:
+        """Close every pooled client, called on application shutdown"""
+        clients = [client for _, client in self._clients.values()]
+        if self._shared_client is not None:
+            clients.append(self._shared_client)
+        self._clients.clear()
+        self._shared_client = None
+        # Nothing is left to wait for at shutdown, so retired clients close now too
+        retired, self._retired = self._retired, {}
+        for task in retired:
+            task.cancel()
+        clients.extend(retired.values())
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+
+client_registry = SonarrClientRegistry()
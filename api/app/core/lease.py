@@ -0,0 +1,114 @@
+# Standard library imports
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+# Third-party imports
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+# Local application imports
+from app.config import settings
+from app.core.database import SessionLocal, run_db
+from app.models.lease import Lease
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process's leases; a restarted process gets a new one
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+class ProcessLease:
+    """Named lease in the app database that one process at a time can hold
+
+    Uvicorn workers share the database, so this is how they agree on who runs
+    work meant to happen once per deployment rather than once per process.
+    While start()ed the holder renews it every ttl/3 seconds; if the holder
+    dies, another process can take it over after `ttl` seconds.
+    """
+
+    def __init__(self, name: str, ttl: Optional[float] = None):
+        self.name = name
+        self.ttl = ttl or settings.LEASE_TTL
+        self.held = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def acquire(self) -> bool:
+        """Take the lease, or renew it if this process holds it, returns whether it is held now"""
+        try:
+            held = await run_db(self._acquire, time.time())
+        except Exception:
+            # Can't tell whether the renewal landed, so stop acting as the holder
+            logger.exception("Could not renew lease %s", self.name)
+            held = False
+        if held != self.held:
+            logger.info("%s lease %s", "Took" if held else "Lost", self.name)
+        self.held = held
+        return held
+
+    async def release(self) -> None:
+        if self.held:
+            self.held = False
+            await run_db(self._release)
+
+    def start(self) -> None:
+        """Keep taking (then renewing) the lease in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.release()
+
+    @asynccontextmanager
+    async def hold(self) -> AsyncIterator[bool]:
+        """Hold the lease for the block if it is free, yields whether it was taken"""
+        if not await self.acquire():
+            yield False
+            return
+        self.start()
+        try:
+            yield True
+        finally:
+            await self.stop()
+
+    async def _run(self) -> None:
+        while True:
+            await self.acquire()
+            await asyncio.sleep(self.ttl / 3)
+
+    def _acquire(self, now: float) -> bool:
+        db = SessionLocal()
+        try:
+            renewed = db.query(Lease).filter(
+                Lease.name == self.name,
+                or_(Lease.owner == OWNER, Lease.expires_at < now)
+            ).update({"owner": OWNER, "expires_at": now + self.ttl}, synchronize_session=False)
+            if not renewed:
+                # Fails on the primary key while another process holds it
+                db.add(Lease(name=self.name, owner=OWNER, expires_at=now + self.ttl))
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+    def _release(self) -> None:
+        db = SessionLocal()
+        try:
+            db.query(Lease).filter(Lease.name == self.name, Lease.owner == OWNER).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+# Elects the process that runs the periodic library sync and instance health probes
+leader = ProcessLease("periodic-tasks")
@@ -1,42 +1,261 @@
 # Standard library imports
+import asyncio
+import logging
+import os
+import sqlite3
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import Optional
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
 
-# Simple in-memory session storage
-active_sessions = {}
+# Local application imports
+from app.config import settings
 
-def create_session(username: str) -> str:
-    session_id = str(uuid.uuid4())
-    active_sessions[session_id] = {
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at);
+"""
+
+def _session(username: str, created_at: float, expires_at: float) -> Dict[str, Any]:
+    return {
         "username": username,
-        "created_at": datetime.now(),
-        "expires_at": datetime.now() + timedelta(days=1)
+        "created_at": datetime.fromtimestamp(created_at),
+        "expires_at": datetime.fromtimestamp(expires_at)
     }
-    return session_id
 
-def delete_session(session_id: Optional[str] = None) -> Optional[str]:
-    if session_id and session_id in active_sessions:
-        del active_sessions[session_id]
+class SessionStore(ABC):
+    """Where login sessions live; every session expires `ttl` seconds after it was created"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl or settings.SESSION_TTL
+
+    @abstractmethod
+    async def create(self, username: str) -> str:
+        ...
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """The session's username, created_at and expires_at, or None if it is unknown or expired"""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def sweep(self) -> int:
+        """Drop expired sessions, returns how many were removed"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the queue stats endpoint; must not block"""
+
+    async def close(self) -> None:
+        pass
+
+class MemorySessionStore(SessionStore):
+    """Sessions in a dict, for a single process
+
+    The TTL is the same for every session, so creation order is expiry order:
+    a deque of (expires_at, session_id) lets sweep() stop at the first
+    session that is still valid and costs O(expired), not O(sessions).
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        super().__init__(ttl)
+        # session id -> (expires_at epoch, session); the float keeps lookups free of datetime work
+        self.sessions: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._expiry: Deque[Tuple[float, str]] = deque()
+        self.swept = 0
+
+    async def create(self, username: str) -> str:
+        session_id = str(uuid.uuid4())
+        now = time.time()
+        expires_at = now + self.ttl
+        self.sessions[session_id] = (expires_at, _session(username, now, expires_at))
+        self._expiry.append((expires_at, session_id))
+        return session_id
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.sessions.get(session_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self.sessions[session_id]
+            return None
+        return entry[1]
+
+    async def delete(self, session_id: str) -> None:
+        # Its deque entry stays until the sweep reaches it
+        self.sessions.pop(session_id, None)
+
+    async def sweep(self) -> int:
+        now = time.time()
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, session_id = self._expiry.popleft()
+            entry = self.sessions.get(session_id)
+            if entry is not None and entry[0] == expires_at:
+                del self.sessions[session_id]
+                removed += 1
+        self.swept += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "sessions": len(self.sessions), "swept": self.swept}
+
+class SqliteSessionStore(SessionStore):
+    """Sessions in a SQLite file shared by every worker process, with an in-process read-through cache
+
+    A cached session is trusted for `cache_ttl` seconds, so a logout in another
+    process takes at most that long to be seen here. Unknown ids are not
+    cached, so a session created by another process is found straight away.
+    Cache hits are answered on the event loop; everything that touches the
+    file runs on the store's own thread, since it may wait on another
+    process's write lock.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None, cache_ttl: Optional[float] = None):
+        super().__init__(ttl)
+        self.path = path or settings.SESSION_DATABASE_PATH
+        self.cache_ttl = settings.SESSION_CACHE_TTL if cache_ttl is None else cache_ttl
+        # session id -> (cached until, expires_at epoch, session)
+        self._cache: Dict[str, Tuple[float, float, Dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.swept = 0
+        self.stored: Optional[int] = None  # rows in the table as of the last sweep
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sessions")
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args))
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+        self._executor.shutdown()
+
+    async def create(self, username: str) -> str:
+        session_id = str(uuid.uuid4())
+        now = time.time()
+        expires_at = now + self.ttl
+        await self._run(
+            self._conn.execute,
+            "INSERT INTO sessions (session_id, username, created_at, expires_at) VALUES (?, ?, ?, ?)",
+            (session_id, username, now, expires_at)
+        )
+        self._cache[session_id] = (now + self.cache_ttl, expires_at, _session(username, now, expires_at))
+        return session_id
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        entry = self._cache.get(session_id)
+        if entry is not None and entry[0] > now:
+            if entry[1] <= now:
+                self._cache.pop(session_id, None)
+                return None
+            self.hits += 1
+            return entry[2]
+
+        self.misses += 1
+        row = await self._run(self._load, session_id, now)
+        if row is None:
+            self._cache.pop(session_id, None)
+            return None
+        session = _session(*row)
+        self._cache[session_id] = (now + self.cache_ttl, row[2], session)
+        return session
+
+    def _load(self, session_id: str, now: float) -> Optional[Tuple[str, float, float]]:
+        return self._conn.execute(
+            "SELECT username, created_at, expires_at FROM sessions WHERE session_id = ? AND expires_at > ?",
+            (session_id, now)
+        ).fetchone()
+
+    async def delete(self, session_id: str) -> None:
+        self._cache.pop(session_id, None)
+        await self._run(self._conn.execute, "DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    async def sweep(self) -> int:
+        now = time.time()
+        removed, self.stored = await self._run(self._delete_expired, now)
+        stale = [session_id for session_id, entry in self._cache.items() if min(entry[0], entry[1]) <= now]
+        for session_id in stale:
+            del self._cache[session_id]
+        self.swept += removed
+        return removed
+
+    def _delete_expired(self, now: float) -> Tuple[int, int]:
+        # Indexed on expires_at, so this only visits the expired rows
+        removed = self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+        return removed, self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "sessions": self.stored,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "swept": self.swept
+        }
+
+def _create_store() -> SessionStore:
+    if settings.SESSION_BACKEND == "sqlite":
+        return SqliteSessionStore()
+    if settings.SESSION_BACKEND == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_BACKEND: {settings.SESSION_BACKEND}")
+
+session_store = _create_store()
+
+async def run_session_sweeper(interval: float) -> None:
+    """Remove expired sessions every `interval` seconds, forever"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await session_store.sweep()
+            if removed:
+                logger.debug("Swept %d expired sessions", removed)
+        except Exception:
+            logger.exception("Session sweep failed")
+
+async def create_session(username: str) -> str:
+    return await session_store.create(username)
+
+async def delete_session(session_id: Optional[str] = None) -> Optional[str]:
+    if session_id:
+        await session_store.delete(session_id)
     return None
 
-def get_session(session_id: str) -> Optional[dict]:
-    if session_id not in active_sessions:
-        return None
-    
-    session = active_sessions[session_id]
-    if datetime.now() > session["expires_at"]:
-        del active_sessions[session_id]
-        return None
-    
-    return session
+async def get_session(session_id: str) -> Optional[dict]:
+    return await session_store.get(session_id)
 
-def get_current_user(session_id: Optional[str] = None) -> Optional[str]:
+async def get_current_user(session_id: Optional[str] = None) -> Optional[str]:
     if not session_id:
         return None
-    
-    session = get_session(session_id)
+
+    session = await get_session(session_id)
     if not session:
         return None
-    
-    return session["username"] 
\ No newline at end of file
+
+    return session["username"]
@@ -1,13 +1,18 @@
-from fastapi import APIRouter
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
 from strawberry.fastapi import GraphQLRouter
 from app.graphql.schema import schema, Query, Mutation
 from app.core.database import get_db
 
 graphql_router = APIRouter()
 
+async def get_context(db: Session = Depends(get_db)) -> Dict[str, Any]:
+    return {"db": db}
+
 graphql_app = GraphQLRouter(
     schema=schema,
-    context_getter=lambda: {"db": next(get_db())}
+    context_getter=get_context
 )
 
 graphql_router.include_router(graphql_app, prefix="/graphql") 
\ No newline at end of file
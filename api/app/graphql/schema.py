@@ -5,18 +5,19 @@ from enum import Enum
 from typing import List, Optional, Dict
 
 # Third-party imports
-from fastapi import Depends
+from fastapi import Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 import strawberry
 from strawberry.fastapi import GraphQLRouter
 
 # Local application imports
-from app.core.auth import get_current_user, verify_password, authenticate_user, login as auth_login
-from app.core.database import get_db
-from app.core.session import create_session, delete_session
+from app.core.auth import verify_password, authenticate_user, login as auth_login
+from app.core.database import db_session, run_db
+from app.core.session import delete_session, get_current_user
 from app.models.sonarr_instance import SonarrInstance
 from app.models.user import User
+from app.services.health_monitor import health_monitor
 from app.services.sonarr_instance import SonarrInstanceService
 from app.services.queue_service import QueueService
 
@@ -56,6 +57,7 @@ class SonarrInstanceType:
     status: InstanceStatus
     last_checked: Optional[datetime]
     error_message: Optional[str]
+    latency_ms: Optional[float] = None
 
 @strawberry.input
 class SonarrInstanceInput:
@@ -85,39 +87,41 @@ class LogoutResponse:
 class Query:
     @strawberry.field
     async def sonarr_instances(self, info) -> List[SonarrInstanceType]:
-        db = next(get_db())
-        instances = db.query(SonarrInstance).all()
-        return [
-            SonarrInstanceType(
+        async with db_session() as db:
+            instances = await run_db(db.query(SonarrInstance).all)
+        result = []
+        for instance in instances:
+            # Prefer the health monitor's latest probe over the last value committed to the row
+            health = health_monitor.get(instance.id) or instance
+            result.append(SonarrInstanceType(
                 id=instance.id,
                 name=instance.name,
                 url=instance.url,
                 is_active=instance.is_active,
-                status=InstanceStatus(instance.status),
-                last_checked=instance.last_checked,
-                error_message=instance.error_message
-            )
-            for instance in instances
-        ]
+                status=InstanceStatus(health.status),
+                last_checked=health.last_checked,
+                error_message=health.error_message,
+                latency_ms=health.latency_ms
+            ))
+        return result
 
     @strawberry.field
     async def me(self, info) -> Optional[str]:
-        user = await get_current_user()
-        return user
+        return await get_current_user(info.context["request"].cookies.get("session_id"))
 
 @strawberry.type
 class Mutation:
     @strawberry.mutation
     async def create_sonarr_instance(self, info, input: SonarrInstanceInput) -> SonarrInstanceType:
-        db = next(get_db())
         instance = SonarrInstance(
             name=input.name,
             url=input.url,
             api_key=input.api_key
         )
-        db.add(instance)
-        db.commit()
-        db.refresh(instance)
+        async with db_session() as db:
+            db.add(instance)
+            await run_db(db.commit)
+            await run_db(db.refresh, instance)
         return SonarrInstanceType(
             id=instance.id,
             name=instance.name,
@@ -130,19 +134,19 @@ class Mutation:
 
     @strawberry.mutation
     async def delete_sonarr_instance(self, info, id: int) -> bool:
-        db = next(get_db())
-        instance = db.query(SonarrInstance).filter(SonarrInstance.id == id).first()
-        if instance:
-            db.delete(instance)
-            db.commit()
-            return True
+        async with db_session() as db:
+            instance = await run_db(db.query(SonarrInstance).filter(SonarrInstance.id == id).first)
+            if instance:
+                db.delete(instance)
+                await run_db(db.commit)
+                return True
         return False
 
     @strawberry.mutation
     async def test_connection(self, info, input: ConnectionTestInput) -> ConnectionTestResult:
-        db = next(get_db())
-        service = SonarrInstanceService(db)
-        success = await service._test_connection(input.url, input.api_key)
+        async with db_session() as db:
+            service = SonarrInstanceService(db)
+            success = await service._test_connection(input.url, input.api_key)
         return ConnectionTestResult(
             success=success,
             message="Connection successful" if success else "Failed to connect to Sonarr instance"
@@ -155,8 +159,9 @@ class Mutation:
         username: str,
         password: str,
     ) -> LoginResponse:
+        request = info.context["request"]
         try:
-            session_id = await auth_login(username, password)
+            session_id = await auth_login(username, password, request.client.host if request.client else None)
             response = info.context["response"]
             response.set_cookie(
                 key="session_id",
@@ -166,11 +171,16 @@ class Mutation:
                 samesite="lax"
             )
             return LoginResponse(message="Login successful")
+        except HTTPException as e:
+            if e.status_code == 429:
+                raise Exception(e.detail)
+            raise Exception("Invalid username or password")
         except Exception as e:
             raise Exception("Invalid username or password")
 
     @strawberry.mutation
     async def logout(self, info) -> LogoutResponse:
+        await delete_session(info.context["request"].cookies.get("session_id"))
         response = info.context["response"]
         response.delete_cookie("session_id")
         return LogoutResponse(message="Logout successful")
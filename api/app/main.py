@@ -1,23 +1,36 @@
 # Standard library imports
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, List, Optional
 
 # Third-party imports
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Body, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 # Local application imports
-from app.routers import sonarr, queue, health
+from app.routers import sonarr, queue, health, library
 from app.graphql.schema import graphql_app
-from app.core.database import engine, Base
+from app.core.database import engine, Base, add_missing_columns, db_session, run_db
 from app.config import settings
+from app.core.auth import prepare_admin_hash
+from app.core.http_client import client_registry
+from app.core.lease import leader
 from app.core.logging import setup_logging
-from app.services.queue_service import QueueService
+from app.core.session import run_session_sweeper, session_store
+from app.models.sonarr_instance import SonarrInstance
+from app.routers.queue import get_queue_service
+from app.services.health_monitor import health_monitor
+from app.services.library_sync import run_periodic_sync
+from app.services.queue_service import JOB_STATUSES, QueueService
+from app.services.search_job import encode_jobs
+from app.services.sonarr_service import circuit_breakers, rate_limiter, sonarr_cache
+from app.services.worker_pool import SearchWorkerPool
 
 # Setup logging
 setup_logging()
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+add_missing_columns()
 
 app = FastAPI(
     title="Grabarr API",
@@ -41,51 +54,177 @@ app.add_middleware(
 app.include_router(sonarr.router, prefix="/api", tags=["sonarr"])
 app.include_router(queue.router, prefix="/api", tags=["queue"])
 app.include_router(health.router, prefix="/api", tags=["health"])
+app.include_router(library.router, prefix="/api", tags=["library"])
 
 # Include GraphQL
 app.include_router(graphql_app, prefix="/graphql")
 
+search_workers: Optional[SearchWorkerPool] = None
+
+@app.on_event("startup")
+async def start_search_workers():
+    global search_workers
+    queue_service = get_queue_service()
+    async with db_session() as db:
+        weights = await run_db(db.query(SonarrInstance.id, SonarrInstance.queue_weight).all)
+    for instance_id, weight in weights:
+        queue_service.set_instance_weight(instance_id, weight)
+    queue_service.register_stats("rate_limits", rate_limiter.stats)
+    queue_service.register_stats("sonarr_cache", sonarr_cache.stats)
+    queue_service.register_stats("circuit_breakers", circuit_breakers.stats)
+    queue_service.register_stats("sessions", session_store.stats)
+    journal = getattr(queue_service, "journal", None)
+    if journal is not None:
+        journal.start(queue_service.snapshot_rows)
+        queue_service.register_stats("journal", journal.stats)
+    search_workers = SearchWorkerPool(queue_service)
+    await search_workers.start()
+
+@app.on_event("shutdown")
+async def stop_search_workers():
+    if search_workers is not None:
+        await search_workers.stop()
+    # After the workers, so the jobs they finished on the way out make it into the snapshot
+    queue_service = get_queue_service()
+    journal = getattr(queue_service, "journal", None)
+    if journal is not None:
+        await journal.close()
+    await queue_service.close()
+
+library_sync_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_library_sync():
+    global library_sync_task
+    if settings.LIBRARY_SYNC_INTERVAL > 0:
+        library_sync_task = asyncio.create_task(run_periodic_sync(settings.LIBRARY_SYNC_INTERVAL))
+
+@app.on_event("shutdown")
+async def stop_library_sync():
+    if library_sync_task is not None:
+        library_sync_task.cancel()
+        await asyncio.gather(library_sync_task, return_exceptions=True)
+
+@app.on_event("startup")
+async def start_health_monitor():
+    circuit_breakers.listen(health_monitor.circuit_changed)
+    if settings.HEALTH_CHECK_INTERVAL > 0:
+        health_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_health_monitor():
+    await health_monitor.stop()
+
+@app.on_event("startup")
+async def start_leader_election():
+    # Keeps the lease the periodic sync and health probes above take fresh while they run
+    leader.start()
+
+@app.on_event("shutdown")
+async def stop_leader_election():
+    # After those tasks have stopped, so the next leader never overlaps with them
+    await leader.stop()
+
+session_sweeper_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    global session_sweeper_task
+    session_sweeper_task = asyncio.create_task(run_session_sweeper(settings.SESSION_SWEEP_INTERVAL))
+
+@app.on_event("shutdown")
+async def stop_session_sweeper():
+    if session_sweeper_task is not None:
+        session_sweeper_task.cancel()
+        await asyncio.gather(session_sweeper_task, return_exceptions=True)
+    await session_store.close()
+
+@app.on_event("startup")
+async def hash_admin_password():
+    await prepare_admin_hash()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await client_registry.aclose()
+
 @app.get("/")
 async def root():
     return {"message": "grabarr API"}
 
 @app.get("/api/queue/stats")
-async def get_queue_stats(queue_service: QueueService = Depends(QueueService)):
+async def get_queue_stats(queue_service: QueueService = Depends(get_queue_service)):
     stats = await queue_service.get_queue_status()
     return stats
 
+@app.get("/api/queue/jobs")
+async def list_jobs(
+    status: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    queue_service: QueueService = Depends(get_queue_service)
+):
+    if status is not None and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown job status: {status}")
+    jobs = await queue_service.list_jobs(status, limit=limit, offset=offset)
+    return Response(content=encode_jobs(jobs), media_type="application/json")
+
 @app.post("/api/queue/jobs")
 async def schedule_job(
     job: Dict[str, Any],
-    queue_service: QueueService = Depends(QueueService)
+    queue_service: QueueService = Depends(get_queue_service)
 ):
-    job_id = await queue_service.add_search(job)
+    try:
+        job_id = await queue_service.add_search(job)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"status": "success", "job_id": job_id}
 
+@app.post("/api/queue/jobs/bulk")
+async def schedule_jobs(
+    jobs: List[Dict[str, Any]],
+    queue_service: QueueService = Depends(get_queue_service)
+):
+    try:
+        job_ids = await queue_service.add_searches(jobs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "job_ids": job_ids}
+
 @app.post("/api/queue/jobs/{job_id}/retry")
 async def retry_job(
     job_id: str,
-    queue_service: QueueService = Depends(QueueService)
+    queue_service: QueueService = Depends(get_queue_service)
 ):
     job = await queue_service.get_job_status(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "dead_letter":
+        await queue_service.requeue_dead_letters([job_id])
+        return {"status": "success", "job_id": job_id}
     if job["status"] != "failed":
         raise HTTPException(status_code=400, detail="Job is not in failed state")
     
-    await queue_service.add_search(job)
-    return {"status": "success"}
+    new_job_id = await queue_service.retry_job(job_id)
+    return {"status": "success", "job_id": new_job_id}
+
+@app.post("/api/queue/dead-letter/requeue")
+async def requeue_dead_letters(
+    job_ids: Optional[List[str]] = Body(None, embed=True),
+    instance_id: Optional[int] = Body(None, embed=True),
+    queue_service: QueueService = Depends(get_queue_service)
+):
+    requeued = await queue_service.requeue_dead_letters(job_ids, instance_id)
+    return {"status": "success", "requeued": len(requeued), "job_ids": requeued}
 
 @app.post("/api/queue/jobs/{job_id}/cancel")
 async def cancel_job(
     job_id: str,
-    queue_service: QueueService = Depends(QueueService)
+    queue_service: QueueService = Depends(get_queue_service)
 ):
     job = await queue_service.get_job_status(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    if job["status"] not in ["queued", "processing"]:
+    if not await queue_service.cancel_job(job_id):
         raise HTTPException(status_code=400, detail="Job cannot be cancelled in its current state")
     
-    job["status"] = "cancelled"
     return {"status": "success"} 
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Third-party imports
+from sqlalchemy import Column, Float, Integer, String, Text
+
+# Local application imports
+from app.core.database import Base
+
+class ArchivedJob(Base):
+    __tablename__ = "archived_jobs"
+
+    job_id = Column(String, primary_key=True)
+    instance_id = Column(Integer, index=True, nullable=True)
+    episode_id = Column(Integer, nullable=True)
+    status = Column(String, index=True)
+    finished_at = Column(Float, index=True)  # epoch seconds
+    data = Column(Text)  # compact JSON of the job as the queue last saw it
+
+    def __repr__(self):
+        return f"<ArchivedJob(job_id='{self.job_id}', status='{self.status}')>"
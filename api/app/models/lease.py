@@ -0,0 +1,15 @@
+# Third-party imports
+from sqlalchemy import Column, Float, String
+
+# Local application imports
+from app.core.database import Base
+
+class Lease(Base):
+    __tablename__ = "leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)  # host:pid:nonce of the process holding it
+    expires_at = Column(Float, nullable=False)  # epoch seconds
+
+    def __repr__(self):
+        return f"<Lease(name='{self.name}', owner='{self.owner}')>"
@@ -1,5 +1,5 @@
 # Third-party imports
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float
 from sqlalchemy.sql import func
 
 # Local application imports
@@ -18,6 +18,12 @@ class SonarrInstance(Base):
     last_checked = Column(DateTime(timezone=True))
     status = Column(String, default="unknown")  # online, offline, error
     error_message = Column(String, nullable=True)
+    latency_ms = Column(Float, nullable=True)  # response time of the last status probe
+    # Overrides for RATE_LIM_WINDOW / MAX_REQUESTS_PER_WINDOW, null uses the global setting
+    rate_limit_requests = Column(Integer, nullable=True)
+    rate_limit_window = Column(Integer, nullable=True)
+    # Share of search dispatches relative to other instances with queued work, null means 1.0
+    queue_weight = Column(Float, nullable=True)
 
     def __repr__(self):
         return f"<SonarrInstance(name='{self.name}', url='{self.url}')>" 
\ No newline at end of file
@@ -0,0 +1,53 @@
+# Third-party imports
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String
+
+# Local application imports
+from app.core.database import Base
+
+class MirroredSeries(Base):
+    __tablename__ = "mirrored_series"
+
+    instance_id = Column(Integer, primary_key=True)
+    series_id = Column(Integer, primary_key=True)
+    title = Column(String)
+    monitored = Column(Boolean, default=True)
+    last_info_sync = Column(String, nullable=True)
+    episode_count = Column(Integer, default=0)
+    episode_file_count = Column(Integer, default=0)
+    fingerprint = Column(String)  # changes whenever Sonarr refreshes the series or its file stats
+
+    def __repr__(self):
+        return f"<MirroredSeries(instance_id={self.instance_id}, title='{self.title}')>"
+
+class MirroredEpisode(Base):
+    __tablename__ = "mirrored_episodes"
+    __table_args__ = (
+        Index("ix_mirrored_episodes_series", "instance_id", "series_id"),
+        Index("ix_mirrored_episodes_missing", "instance_id", "monitored", "has_file", "air_date_utc"),
+    )
+
+    instance_id = Column(Integer, primary_key=True)
+    episode_id = Column(Integer, primary_key=True)
+    series_id = Column(Integer)
+    season_number = Column(Integer)
+    episode_number = Column(Integer)
+    title = Column(String, nullable=True)
+    air_date_utc = Column(String, nullable=True)  # ISO-8601 UTC as sent by Sonarr, sorts chronologically
+    monitored = Column(Boolean, default=True)
+    has_file = Column(Boolean, default=False)
+
+    def __repr__(self):
+        return f"<MirroredEpisode(instance_id={self.instance_id}, episode_id={self.episode_id})>"
+
+class LibrarySyncState(Base):
+    __tablename__ = "library_sync_state"
+
+    instance_id = Column(Integer, primary_key=True)
+    last_full_sync = Column(DateTime, nullable=True)
+    last_sync = Column(DateTime, nullable=True)
+    last_duration = Column(Float, nullable=True)  # seconds
+    last_rows_changed = Column(Integer, nullable=True)
+    last_error = Column(String, nullable=True)
+    # Episode reloads committed so far out of those the current (or last) sync needs
+    series_synced = Column(Integer, nullable=True)
+    series_to_sync = Column(Integer, nullable=True)
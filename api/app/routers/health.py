@@ -1,43 +1,50 @@
 # Standard library imports
+from dataclasses import asdict
 from typing import Dict, Any
 
 # Third-party imports
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
 
 # Local application imports
-from app.core.database import get_db
+from app.routers.queue import get_queue_service
+from app.services.health_monitor import health_monitor
+from app.services.queue_service import QueueService
+from app.services.search_job import JobStatus
 
 router = APIRouter()
 
+async def _require_database() -> None:
+    # Served from the background monitor while its rounds keep the result current; with the
+    # monitor off, or a round overdue, check now so an old result (a failure especially) never sticks
+    healthy = health_monitor.db_healthy
+    if not health_monitor.database_current():
+        healthy = await health_monitor.check_database()
+    if not healthy:
+        raise HTTPException(status_code=503, detail=f"Database health check failed: {health_monitor.db_error}")
+
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)) -> Dict[str, str]:
-    try:
-        # Check database connection
-        db.execute("SELECT 1")
-        return {"status": "healthy"}
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Database health check failed: {str(e)}")
+async def health_check() -> Dict[str, str]:
+    await _require_database()
+    return {"status": "healthy"}
 
 @router.get("/health/db")
-async def db_health_check(db: Session = Depends(get_db)) -> Dict[str, str]:
-    try:
-        # Simple query to check database connection
-        db.execute("SELECT 1")
-        return {"status": "healthy"}
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Database health check failed: {str(e)}")
+async def db_health_check() -> Dict[str, Any]:
+    await _require_database()
+    return {"status": "healthy", "last_checked": health_monitor.last_run}
+
+@router.get("/health/instances")
+async def instances_health_check() -> Dict[str, Any]:
+    return {
+        "last_checked": health_monitor.last_run,
+        "instances": [asdict(health) for health in health_monitor.instances.values()]
+    }
 
 @router.get("/health/queue")
-async def queue_health_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
-    try:
-        # Check database connection
-        db.execute("SELECT 1")
-        
-        return {
-            "status": "healthy",
-            "queue_size": 0,
-            "processing_size": 0
-        }
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Queue health check failed: {str(e)}") 
\ No newline at end of file
+async def queue_health_check(queue_service: QueueService = Depends(get_queue_service)) -> Dict[str, Any]:
+    await _require_database()
+    counts = await queue_service.counts()
+    return {
+        "status": "healthy",
+        "queue_size": counts[JobStatus.QUEUED.value],
+        "processing_size": counts[JobStatus.PROCESSING.value]
+    }
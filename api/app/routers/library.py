@@ -0,0 +1,50 @@
+# Standard library imports
+from typing import Any, Dict, List
+
+# Third-party imports
+from fastapi import APIRouter, Depends, HTTPException
+import httpx
+from sqlalchemy.orm import Session
+
+# Local application imports
+from app.core.database import get_db, run_db
+from app.models.sonarr_instance import SonarrInstance
+from app.services.library_sync import LibrarySyncService, SyncInProgressError
+
+router = APIRouter()
+
+@router.post("/library/{instance_id}/sync")
+async def sync_library(instance_id: int, full: bool = False, db: Session = Depends(get_db)) -> Dict[str, Any]:
+    instance = await run_db(db.query(SonarrInstance).filter(SonarrInstance.id == instance_id).first)
+    if not instance:
+        raise HTTPException(status_code=404, detail="Instance not found")
+    try:
+        return await LibrarySyncService(db).sync_instance(instance, full=full)
+    except SyncInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Error communicating with Sonarr: {str(e)}")
+
+@router.get("/library/sync-status")
+async def get_sync_status(db: Session = Depends(get_db)) -> List[Dict[str, Any]]:
+    return await run_db(LibrarySyncService(db).sync_status)
+
+@router.get("/library/{instance_id}/missing")
+async def get_missing_episodes(
+    instance_id: int,
+    limit: int = 100,
+    offset: int = 0,
+    db: Session = Depends(get_db)
+) -> List[Dict[str, Any]]:
+    episodes = await run_db(LibrarySyncService(db).missing_episodes, instance_id, limit=limit, offset=offset)
+    return [
+        {
+            "episode_id": episode.episode_id,
+            "series_id": episode.series_id,
+            "season_number": episode.season_number,
+            "episode_number": episode.episode_number,
+            "title": episode.title,
+            "air_date_utc": episode.air_date_utc
+        }
+        for episode in episodes
+    ]
@@ -1,29 +1,42 @@
 # Standard library imports
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 
 # Third-party imports
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 # Local application imports
+from app.config import settings
 from app.core.database import get_db
+from app.services.job_archive import JobArchive
+from app.services.queue_journal import QueueJournal
 from app.services.queue_service import QueueService
+from app.services.shared_queue import SharedQueueService
 
 router = APIRouter()
 
-# Global queue service instance
-_queue_service: Optional[QueueService] = None
+# Queue service for this process; with QUEUE_BACKEND=sqlite every process sees the same jobs
+_queue_service: Optional[Union[QueueService, SharedQueueService]] = None
 
-def get_queue_service() -> QueueService:
+def get_queue_service() -> Union[QueueService, SharedQueueService]:
     global _queue_service
     if _queue_service is None:
-        _queue_service = QueueService()
+        if settings.QUEUE_BACKEND == "sqlite":
+            _queue_service = SharedQueueService(archive=JobArchive())
+        elif settings.QUEUE_BACKEND == "memory":
+            journal = QueueJournal(settings.QUEUE_JOURNAL_DIR) if settings.QUEUE_JOURNAL_DIR else None
+            _queue_service = QueueService(archive=JobArchive(), journal=journal)
+        else:
+            raise ValueError(f"Unknown QUEUE_BACKEND: {settings.QUEUE_BACKEND}")
     return _queue_service
 
 @router.post("/search")
 async def add_search(search_data: Dict[str, Any]) -> Dict[str, str]:
     queue_service = get_queue_service()
-    job_id = await queue_service.add_search(search_data)
+    try:
+        job_id = await queue_service.add_search(search_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"job_id": job_id}
 
 @router.get("/status")
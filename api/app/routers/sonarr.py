@@ -1,48 +1,137 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, Hashable, List, Optional, Set
+import asyncio
 import httpx
 import os
 
+from app.config import settings
+from app.core.http_client import client_registry
+from app.services.sonarr_service import sonarr_cache
+from app.utils.cache import MISSING
+
 router = APIRouter()
 
 # Sonarr configuration
 SONARR_API_KEY = os.getenv("SONARR_API_KEY")
 SONARR_BASE_URL = os.getenv("SONARR_BASE_URL")
 
-@router.get("/series")
-async def get_series():
-    """
-    Get all series from Sonarr
-    """
+# Cache key prefix for the env-configured instance, which has no instance id
+CACHE_PREFIX = "env"
+
+# Keys whose body is being streamed from Sonarr right now -> the complete body,
+# or None if it could not be cached
+_streaming: Dict[Hashable, asyncio.Future] = {}
+# Futures of the streams above whose relay has begun sending the body to its client
+_relaying: Set[asyncio.Future] = set()
+
+async def _fetch(path: str) -> bytes:
+    client = client_registry.get_shared_client()
+    response = await client.get(
+        f"{SONARR_BASE_URL}{path}",
+        headers={"X-Api-Key": SONARR_API_KEY}
+    )
+    response.raise_for_status()
+    return response.content
+
+async def _proxy(path: str, refresh: bool) -> Response:
+    """Serve a Sonarr GET from the raw-body cache, or stream it straight through on a miss"""
     if not SONARR_API_KEY or not SONARR_BASE_URL:
         raise HTTPException(status_code=500, detail="Sonarr configuration missing")
     
+    key = (CACHE_PREFIX, path)
+    if refresh:
+        sonarr_cache.invalidate(key)
+    body = sonarr_cache.lookup(key, lambda: _fetch(path))
+    if body is not MISSING:
+        return Response(content=body, media_type="application/json")
+
+    pending = _streaming.get(key)
+    if pending is not None:
+        # Another request is already streaming this body; wait for its copy instead of a second upstream call
+        return Response(content=await _follow(key, path, pending), media_type="application/json")
+
+    streamed = asyncio.get_running_loop().create_future()
+    _streaming[key] = streamed
+    client = client_registry.get_shared_client()
+    try:
+        request = client.build_request("GET", f"{SONARR_BASE_URL}{path}", headers={"X-Api-Key": SONARR_API_KEY})
+        upstream = await client.send(request, stream=True)
+    except httpx.HTTPError as e:
+        _finish_stream(key, streamed, None)
+        raise HTTPException(status_code=500, detail=f"Error communicating with Sonarr: {str(e)}")
+    except BaseException:
+        _finish_stream(key, streamed, None)
+        raise
+    if upstream.is_error:
+        _finish_stream(key, streamed, None)
+        await upstream.aclose()
+        raise HTTPException(status_code=500, detail=f"Error communicating with Sonarr: HTTP {upstream.status_code}")
+
+    return StreamingResponse(_relay(key, upstream, streamed), media_type="application/json")
+
+async def _follow(key, path: str, pending: asyncio.Future) -> bytes:
+    while True:
+        try:
+            body = await asyncio.wait_for(asyncio.shield(pending), settings.SONARR_TIMEOUT)
+            break
+        except asyncio.TimeoutError:
+            if pending in _relaying:
+                # A large body on a slow link; its copy still beats a second upstream call
+                continue
+            # The stream was abandoned before it started (e.g. the client went away), so stop routing others to it
+            if _streaming.get(key) is pending:
+                del _streaming[key]
+            body = None
+            break
+    if body is not None:
+        return body
+    # Too big to cache or failed: load it once for everyone who was waiting
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SONARR_BASE_URL}/api/v3/series",
-                headers={"X-Api-Key": SONARR_API_KEY}
-            )
-            response.raise_for_status()
-            return response.json()
+        return await sonarr_cache.get_or_load(key, lambda: _fetch(path))
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Error communicating with Sonarr: {str(e)}")
 
+def _finish_stream(key, streamed: asyncio.Future, body: Optional[bytes]) -> None:
+    if _streaming.get(key) is streamed:
+        del _streaming[key]
+    if not streamed.done():
+        streamed.set_result(body)
+
+async def _relay(key, upstream: httpx.Response, streamed: asyncio.Future) -> AsyncIterator[bytes]:
+    # Pass chunks through undecoded, keeping a copy for the cache while the body stays small enough
+    chunks: Optional[List[bytes]] = []
+    size = 0
+    complete = False
+    _relaying.add(streamed)
+    try:
+        async for chunk in upstream.aiter_bytes():
+            if chunks is not None:
+                size += len(chunk)
+                if size > settings.SONARR_CACHE_MAX_BODY_BYTES:
+                    chunks = None
+                else:
+                    chunks.append(chunk)
+            yield chunk
+        complete = True
+    finally:
+        await upstream.aclose()
+        body = b"".join(chunks) if complete and chunks is not None else None
+        if body is not None:
+            sonarr_cache.put(key, body)
+        _finish_stream(key, streamed, body)
+        _relaying.discard(streamed)
+
+@router.get("/series")
+async def get_series(refresh: bool = False):
+    """
+    Get all series from Sonarr
+    """
+    return await _proxy("/api/v3/series", refresh)
+
 @router.get("/series/{series_id}")
-async def get_series_by_id(series_id: int):
+async def get_series_by_id(series_id: int, refresh: bool = False):
     """
     Get a specific series by ID from Sonarr
     """
-    if not SONARR_API_KEY or not SONARR_BASE_URL:
-        raise HTTPException(status_code=500, detail="Sonarr configuration missing")
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SONARR_BASE_URL}/api/v3/series/{series_id}",
-                headers={"X-Api-Key": SONARR_API_KEY}
-            )
-            response.raise_for_status()
-            return response.json()
-    except httpx.HTTPError as e:
-        raise HTTPException(status_code=500, detail=f"Error communicating with Sonarr: {str(e)}") 
\ No newline at end of file
+    return await _proxy(f"/api/v3/series/{series_id}", refresh)
@@ -21,14 +21,14 @@ async def create_instance(
     return await service.create_instance(instance)
 
 @router.get("/", response_model=List[SonarrInstanceResponse])
-def get_instances(db: Session = Depends(get_db)):
+async def get_instances(db: Session = Depends(get_db)):
     service = SonarrInstanceService(db)
-    return service.get_all_instances()
+    return await service.get_all_instances()
 
 @router.get("/{instance_id}", response_model=SonarrInstanceResponse)
-def get_instance(instance_id: int, db: Session = Depends(get_db)):
+async def get_instance(instance_id: int, db: Session = Depends(get_db)):
     service = SonarrInstanceService(db)
-    instance = service.get_instance(instance_id)
+    instance = await service.get_instance(instance_id)
     if not instance:
         raise HTTPException(status_code=404, detail="Instance not found")
     return instance
@@ -46,9 +46,9 @@ async def update_instance(
     return updated_instance
 
 @router.delete("/{instance_id}")
-def delete_instance(instance_id: int, db: Session = Depends(get_db)):
+async def delete_instance(instance_id: int, db: Session = Depends(get_db)):
     service = SonarrInstanceService(db)
-    if not service.delete_instance(instance_id):
+    if not await service.delete_instance(instance_id):
         raise HTTPException(status_code=404, detail="Instance not found")
     return {"message": "Instance deleted successfully"}
 
@@ -3,21 +3,30 @@ from datetime import datetime
 from typing import Optional
 
 # Third-party imports
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, confloat, conint
 
 class SonarrInstanceBase(BaseModel):
     name: str
     url: HttpUrl
     api_key: str
+    rate_limit_requests: Optional[int] = None
+    rate_limit_window: Optional[int] = None
+    queue_weight: Optional[float] = None
 
 class SonarrInstanceCreate(SonarrInstanceBase):
-    pass
+    # Zero would make the token bucket's refill rate zero or infinite, and the scheduler's share zero
+    rate_limit_requests: Optional[conint(gt=0)] = None
+    rate_limit_window: Optional[conint(gt=0)] = None
+    queue_weight: Optional[confloat(gt=0)] = None
 
 class SonarrInstanceUpdate(BaseModel):
     name: Optional[str] = None
     url: Optional[HttpUrl] = None
     api_key: Optional[str] = None
     is_active: Optional[bool] = None
+    rate_limit_requests: Optional[conint(gt=0)] = None
+    rate_limit_window: Optional[conint(gt=0)] = None
+    queue_weight: Optional[confloat(gt=0)] = None
 
 class SonarrInstanceInDB(SonarrInstanceBase):
     id: int
@@ -27,6 +36,7 @@ class SonarrInstanceInDB(SonarrInstanceBase):
     last_checked: Optional[datetime]
     status: str
     error_message: Optional[str]
+    latency_ms: Optional[float]
 
     class Config:
         orm_mode = True
@@ -0,0 +1,213 @@
+# Standard library imports
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Third-party imports
+from sqlalchemy import text
+
+# Local application imports
+from app.config import settings
+from app.core.database import SessionLocal, db_session, run_db
+from app.core.http_client import client_registry
+from app.core.lease import leader
+from app.models.sonarr_instance import SonarrInstance
+from app.services.sonarr_service import circuit_breakers
+from app.utils.circuit_breaker import CircuitBreaker, CircuitState
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class InstanceHealth:
+    """Result of the last status probe of a Sonarr instance"""
+    instance_id: int
+    status: str  # online, offline, error
+    error_message: Optional[str]
+    latency_ms: Optional[float]
+    last_checked: datetime
+
+class InstanceHealthMonitor:
+    """Probes every active Sonarr instance (and the database) on an interval
+
+    Results are kept in memory so health endpoints and the GraphQL instance
+    list can answer from the cache, and written back to the instance rows in
+    a single commit per round. With several uvicorn workers only the leader
+    probes; the others check their own database access and read the leader's
+    results back from the rows.
+    """
+
+    def __init__(self, interval: Optional[float] = None, timeout: Optional[float] = None):
+        self.interval = interval or settings.HEALTH_CHECK_INTERVAL
+        self.timeout = timeout or settings.HEALTH_CHECK_TIMEOUT
+        self.instances: Dict[int, InstanceHealth] = {}
+        self.db_healthy: Optional[bool] = None
+        self.db_error: Optional[str] = None
+        self._db_checked_at: Optional[float] = None  # monotonic time of the last database check
+        self.last_run: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        # instance id -> latest circuit-driven state not written yet, so a flapping circuit costs one write
+        self._unsaved: Dict[int, InstanceHealth] = {}
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._writer is not None:
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+
+    def get(self, instance_id: int) -> Optional[InstanceHealth]:
+        return self.instances.get(instance_id)
+
+    def record(self, health: InstanceHealth) -> None:
+        self.instances[health.instance_id] = health
+
+    def forget(self, instance_id: int) -> None:
+        self.instances.pop(instance_id, None)
+
+    def circuit_changed(self, breaker: CircuitBreaker, state: CircuitState) -> None:
+        """Flip an instance to error as soon as its circuit opens, and back to online when it closes"""
+        if state == CircuitState.HALF_OPEN:
+            return
+        if state == CircuitState.OPEN:
+            status, error = "error", f"Circuit open: {breaker.last_error}"
+        else:
+            status, error = "online", None
+        previous = self.instances.get(breaker.key)
+        health = InstanceHealth(
+            instance_id=breaker.key,
+            status=status,
+            error_message=error,
+            latency_ms=previous.latency_ms if previous else None,
+            last_checked=datetime.utcnow()
+        )
+        self.record(health)
+        # Called from inside a Sonarr request, so the write must not hold up the event loop
+        self._unsaved[health.instance_id] = health
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._write_states())
+
+    async def _write_states(self) -> None:
+        # Changes made while a write is running are picked up by the next pass
+        while self._unsaved:
+            states, self._unsaved = list(self._unsaved.values()), {}
+            await run_db(self._store_states, states)
+
+    @staticmethod
+    def _store_states(states: List[InstanceHealth]) -> None:
+        db = SessionLocal()
+        try:
+            for health in states:
+                db.query(SonarrInstance).filter(SonarrInstance.id == health.instance_id).update({
+                    "status": health.status,
+                    "error_message": health.error_message,
+                    "last_checked": health.last_checked
+                })
+            db.commit()
+        except Exception:
+            logger.exception("Could not store circuit state of instances %s", [health.instance_id for health in states])
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await leader.acquire():
+                    await self.check_all()
+                else:
+                    await self.load_all()
+            except Exception:
+                logger.exception("Instance health check failed")
+            await asyncio.sleep(self.interval)
+
+    async def check_all(self) -> None:
+        async with db_session() as db:
+            try:
+                await run_db(db.execute, text("SELECT 1"))
+                self._record_database(None)
+            except Exception as e:
+                self._record_database(str(e))
+                return
+
+            instances = await run_db(db.query(SonarrInstance).filter(SonarrInstance.is_active == True).all)
+            results: List[InstanceHealth] = await asyncio.gather(*(self.probe(instance) for instance in instances))
+            # Rebuilt each round so deleted or deactivated instances drop out
+            self.instances = {health.instance_id: health for health in results}
+            for instance, health in zip(instances, results):
+                instance.status = health.status
+                instance.error_message = health.error_message
+                instance.latency_ms = health.latency_ms
+                instance.last_checked = health.last_checked
+            await run_db(db.commit)
+            self.last_run = datetime.utcnow()
+
+    async def load_all(self) -> None:
+        """Refresh the cache from the instance rows the leader's last round wrote"""
+        if not await self.check_database():
+            return
+        async with db_session() as db:
+            instances = await run_db(db.query(SonarrInstance).filter(SonarrInstance.is_active == True).all)
+        self.instances = {
+            instance.id: InstanceHealth(
+                instance_id=instance.id,
+                status=instance.status,
+                error_message=instance.error_message,
+                latency_ms=instance.latency_ms,
+                last_checked=instance.last_checked
+            )
+            for instance in instances
+            if instance.last_checked is not None
+        }
+        self.last_run = datetime.utcnow()
+
+    async def check_database(self) -> bool:
+        """Run the database check now, for when the background rounds are not keeping it current"""
+        async with db_session() as db:
+            try:
+                await run_db(db.execute, text("SELECT 1"))
+                self._record_database(None)
+            except Exception as e:
+                self._record_database(str(e))
+        return self.db_healthy
+
+    def database_current(self) -> bool:
+        """Whether the last database check is recent enough to answer from, which needs the monitor running"""
+        if self._task is None or self._db_checked_at is None:
+            return False
+        return time.monotonic() - self._db_checked_at <= self.interval
+
+    def _record_database(self, error: Optional[str]) -> None:
+        self.db_healthy, self.db_error = error is None, error
+        self._db_checked_at = time.monotonic()
+
+    async def probe(self, instance: SonarrInstance) -> InstanceHealth:
+        started = time.monotonic()
+        status, error = "online", None
+        try:
+            client = client_registry.get(instance.id, instance.url, instance.api_key)
+            response = await client.get("/api/v3/system/status", timeout=self.timeout)
+            if response.status_code != 200:
+                status, error = "error", f"Status check returned HTTP {response.status_code}"
+        except Exception as e:
+            status, error = "offline", str(e) or type(e).__name__
+        # Searches are still being held back until the circuit's own trial call succeeds
+        if status == "online" and circuit_breakers.is_open(instance.id):
+            status, error = "error", f"Circuit open: {circuit_breakers.get(instance.id).last_error}"
+        return InstanceHealth(
+            instance_id=instance.id,
+            status=status,
+            error_message=error,
+            latency_ms=round((time.monotonic() - started) * 1000, 1),
+            last_checked=datetime.utcnow()
+        )
+
+health_monitor = InstanceHealthMonitor()
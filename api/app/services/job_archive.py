@@ -0,0 +1,67 @@
+# Standard library imports
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+# Third-party imports
+from sqlalchemy import Integer, cast, func
+
+# Local application imports
+from app.core.database import SessionLocal
+from app.models.archived_job import ArchivedJob
+from app.services.search_job import SearchJob
+
+logger = logging.getLogger(__name__)
+
+# Parts of a Sonarr command response worth keeping once a job leaves memory
+RESULT_FIELDS = ("id", "name", "status")
+
+def compact_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    compact = {k: v for k, v in job.items() if v is not None}
+    result = compact.get("result")
+    if isinstance(result, dict):
+        compact["result"] = {k: result[k] for k in RESULT_FIELDS if k in result}
+    return compact
+
+class JobArchive:
+    """Stores finished jobs evicted from the in-memory queue in SQLite"""
+
+    def store(self, jobs: List[SearchJob], finished_at: Dict[str, float]) -> None:
+        if not jobs:
+            return
+        rows = []
+        for job in jobs:
+            compact = compact_job(job.to_dict())
+            rows.append({
+                "job_id": job.job_id,
+                "instance_id": job.instance_id,
+                "episode_id": job.episode_id,
+                "status": job.status.value,
+                "finished_at": finished_at[job.job_id],
+                "data": json.dumps(compact, separators=(",", ":"), default=str)
+            })
+        db = SessionLocal()
+        try:
+            db.execute(ArchivedJob.__table__.insert().prefix_with("OR REPLACE"), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to archive %d jobs", len(rows))
+        finally:
+            db.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            row = db.query(ArchivedJob).filter(ArchivedJob.job_id == job_id).first()
+            return json.loads(row.data) if row else None
+        finally:
+            db.close()
+
+    def last_job_id(self) -> int:
+        """Highest numeric job id archived so far, so restarted queues never reuse an id"""
+        db = SessionLocal()
+        try:
+            return db.query(func.max(cast(ArchivedJob.job_id, Integer))).scalar() or 0
+        finally:
+            db.close()
@@ -0,0 +1,296 @@
+# Standard library imports
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+# Third-party imports
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+# Local application imports
+from app.config import settings
+from app.core.database import db_session, run_db
+from app.core.lease import ProcessLease, leader
+from app.models.sonarr_instance import SonarrInstance
+from app.models.sonarr_library import LibrarySyncState, MirroredEpisode, MirroredSeries
+from app.services.sonarr_service import SonarrService
+
+logger = logging.getLogger(__name__)
+
+# One sync at a time per instance, whether triggered through the API or the periodic loop; the
+# lock queues syncs within this process, the lease turns away one running in another process
+_sync_locks: Dict[int, asyncio.Lock] = {}
+
+class SyncInProgressError(Exception):
+    """Another process is already syncing the instance"""
+
+def _series_fingerprint(series: Dict[str, Any]) -> str:
+    stats = series.get("statistics") or {}
+    return "|".join(str(value) for value in (
+        series.get("lastInfoSync"),
+        series.get("monitored"),
+        stats.get("episodeCount"),
+        stats.get("episodeFileCount"),
+        stats.get("totalEpisodeCount"),
+        stats.get("sizeOnDisk"),
+    ))
+
+def _series_values(series: Dict[str, Any]) -> Dict[str, Any]:
+    stats = series.get("statistics") or {}
+    return {
+        "title": series.get("title"),
+        "monitored": bool(series.get("monitored")),
+        "last_info_sync": series.get("lastInfoSync"),
+        "episode_count": stats.get("episodeCount") or 0,
+        "episode_file_count": stats.get("episodeFileCount") or 0,
+    }
+
+def _episode_values(episode: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "series_id": episode.get("seriesId"),
+        "season_number": episode.get("seasonNumber"),
+        "episode_number": episode.get("episodeNumber"),
+        "title": episode.get("title"),
+        "air_date_utc": episode.get("airDateUtc"),
+        "monitored": bool(episode.get("monitored")),
+        "has_file": bool(episode.get("hasFile")),
+    }
+
+def _update_row(row: Any, values: Dict[str, Any]) -> bool:
+    changed = False
+    for key, value in values.items():
+        if getattr(row, key) != value:
+            setattr(row, key, value)
+            changed = True
+    return changed
+
+class LibrarySyncService:
+    """Mirrors Sonarr series and episodes into local tables
+
+    The first sync of an instance loads everything. Later syncs only fetch the
+    series list and reload episodes for series whose fingerprint (lastInfoSync
+    plus episode statistics) changed since the last run.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def sync_instance(self, instance: SonarrInstance, full: bool = False) -> Dict[str, Any]:
+        lock = _sync_locks.setdefault(instance.id, asyncio.Lock())
+        async with lock, ProcessLease(f"library-sync:{instance.id}").hold() as held:
+            if not held:
+                raise SyncInProgressError(f"Instance {instance.id} is being synced by another process")
+            try:
+                return await self._sync(instance, full)
+            except Exception as e:
+                await run_db(self._record_error, instance.id, str(e))
+                raise
+
+    def _record_error(self, instance_id: int, error: str) -> None:
+        self.db.rollback()
+        self._get_state(instance_id).last_error = error
+        self.db.commit()
+
+    async def _sync(self, instance: SonarrInstance, full: bool) -> Dict[str, Any]:
+        started = time.monotonic()
+        state = await run_db(self._get_state, instance.id)
+        full = full or state.last_full_sync is None
+        service = SonarrService(instance)
+
+        series_count, changed, rows_changed = await self._apply_series(instance.id, service.iter_series(), full)
+        fingerprints = dict(changed)
+        state.series_synced = 0
+        state.series_to_sync = len(fingerprints)
+        await run_db(self.db.commit)
+
+        # Short transactions: the database stays writable for everyone else during a
+        # long scan, and series committed before a failure are not fetched again
+        failed: Dict[int, str] = {}
+        uncommitted = 0
+        async for fetch in service.iter_episodes(fingerprints, use_cache=False):
+            if fetch.error is not None:
+                failed[fetch.series_id] = str(fetch.error)
+                continue
+            rows_changed += await run_db(
+                self._apply_episodes, instance.id, fetch.series_id, fetch.episodes, fingerprints[fetch.series_id]
+            )
+            state.series_synced += 1
+            uncommitted += 1
+            if uncommitted >= settings.LIBRARY_SYNC_BATCH_SIZE:
+                await run_db(self.db.commit)
+                uncommitted = 0
+
+        now = datetime.utcnow()
+        state.last_sync = now
+        if full:
+            state.last_full_sync = now
+        state.last_duration = time.monotonic() - started
+        state.last_rows_changed = rows_changed
+        state.last_error = f"Episode fetch failed for {len(failed)} series" if failed else None
+        await run_db(self.db.commit)
+
+        report = {
+            "instance_id": instance.id,
+            "mode": "full" if full else "delta",
+            "duration": round(state.last_duration, 3),
+            "series": series_count,
+            "series_changed": len(changed),
+            "series_failed": len(failed),
+            "rows_changed": rows_changed,
+            "errors": dict(list(failed.items())[:20])
+        }
+        logger.info("Library sync of instance %s finished: %s", instance.id, report)
+        return report
+
+    def _get_state(self, instance_id: int) -> LibrarySyncState:
+        state = self.db.query(LibrarySyncState).filter(LibrarySyncState.instance_id == instance_id).first()
+        if state is None:
+            state = LibrarySyncState(instance_id=instance_id)
+            self.db.add(state)
+        return state
+
+    async def _apply_series(
+        self,
+        instance_id: int,
+        series_iter: AsyncIterator[Dict[str, Any]],
+        full: bool
+    ) -> Tuple[int, List[Tuple[int, str]], int]:
+        """Upsert series rows as they stream in
+
+        Returns the number of series seen, the (series_id, fingerprint) pairs
+        whose episodes need a reload and the number of rows changed.
+        """
+        existing = await run_db(self._existing_series, instance_id)
+        series_count = 0
+        changed = []
+        rows_changed = 0
+        async for series in series_iter:
+            series_count += 1
+            fingerprint = _series_fingerprint(series)
+            values = _series_values(series)
+            row = existing.pop(series["id"], None)
+            if row is None:
+                self.db.add(MirroredSeries(instance_id=instance_id, series_id=series["id"], **values))
+                rows_changed += 1
+            elif _update_row(row, values):
+                rows_changed += 1
+            if full or row is None or row.fingerprint != fingerprint:
+                changed.append((series["id"], fingerprint))
+
+        rows_changed += await run_db(self._remove_series, instance_id, existing)
+        return series_count, changed, rows_changed
+
+    def _existing_series(self, instance_id: int) -> Dict[int, MirroredSeries]:
+        return {
+            row.series_id: row
+            for row in self.db.query(MirroredSeries).filter(MirroredSeries.instance_id == instance_id)
+        }
+
+    def _remove_series(self, instance_id: int, removed: Dict[int, MirroredSeries]) -> int:
+        """Delete series that left Sonarr along with their episodes, then flush the series upserts"""
+        rows_changed = 0
+        for series_id, row in removed.items():
+            self.db.delete(row)
+            rows_changed += 1
+            rows_changed += self.db.query(MirroredEpisode).filter(
+                MirroredEpisode.instance_id == instance_id,
+                MirroredEpisode.series_id == series_id
+            ).delete(synchronize_session=False)
+        self.db.flush()
+        return rows_changed
+
+    def _apply_episodes(
+        self,
+        instance_id: int,
+        series_id: int,
+        episodes: List[Dict[str, Any]],
+        fingerprint: str
+    ) -> int:
+        existing = {
+            row.episode_id: row
+            for row in self.db.query(MirroredEpisode).filter(
+                MirroredEpisode.instance_id == instance_id,
+                MirroredEpisode.series_id == series_id
+            )
+        }
+        rows_changed = 0
+        for episode in episodes:
+            values = _episode_values(episode)
+            row = existing.pop(episode["id"], None)
+            if row is None:
+                self.db.add(MirroredEpisode(instance_id=instance_id, episode_id=episode["id"], **values))
+                rows_changed += 1
+            elif _update_row(row, values):
+                rows_changed += 1
+        for row in existing.values():
+            self.db.delete(row)
+            rows_changed += 1
+        # Only mark the series as synced once its episodes are in, so failures are retried next run
+        self.db.query(MirroredSeries).filter(
+            MirroredSeries.instance_id == instance_id,
+            MirroredSeries.series_id == series_id
+        ).update({"fingerprint": fingerprint})
+        return rows_changed
+
+    def missing_episodes(self, instance_id: int, limit: int = 100, offset: int = 0) -> List[MirroredEpisode]:
+        """Monitored, already aired episodes without a file, newest first"""
+        now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        return (
+            self.db.query(MirroredEpisode)
+            .join(MirroredSeries, and_(
+                MirroredSeries.instance_id == MirroredEpisode.instance_id,
+                MirroredSeries.series_id == MirroredEpisode.series_id
+            ))
+            .filter(
+                MirroredEpisode.instance_id == instance_id,
+                MirroredEpisode.monitored == True,
+                MirroredEpisode.has_file == False,
+                MirroredEpisode.air_date_utc != None,
+                MirroredEpisode.air_date_utc <= now,
+                MirroredSeries.monitored == True
+            )
+            .order_by(MirroredEpisode.air_date_utc.desc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+
+    def sync_status(self) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return [
+            {
+                "instance_id": state.instance_id,
+                "last_sync": state.last_sync,
+                "last_full_sync": state.last_full_sync,
+                "last_duration": state.last_duration,
+                "last_rows_changed": state.last_rows_changed,
+                "last_error": state.last_error,
+                "series_synced": state.series_synced,
+                "series_to_sync": state.series_to_sync,
+                "lag": (now - state.last_sync).total_seconds() if state.last_sync else None
+            }
+            for state in self.db.query(LibrarySyncState).all()
+        ]
+
+async def run_periodic_sync(interval: float) -> None:
+    """Delta-sync every active instance, forever, `interval` seconds apart, while this process is the leader"""
+    while True:
+        if not await leader.acquire():
+            # Check back often enough to take over soon after the leader goes away
+            await asyncio.sleep(min(interval, leader.ttl))
+            continue
+        async with db_session() as db:
+            service = LibrarySyncService(db)
+            instances = await run_db(db.query(SonarrInstance).filter(SonarrInstance.is_active == True).all)
+            # Detached, so the rollback after one failed sync doesn't expire the others mid-loop
+            db.expunge_all()
+            for instance in instances:
+                try:
+                    await service.sync_instance(instance)
+                except SyncInProgressError as e:
+                    logger.info("Skipping library sync: %s", e)
+                except Exception:
+                    logger.exception("Library sync failed for instance %s", instance.id)
+        await asyncio.sleep(interval)
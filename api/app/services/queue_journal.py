@@ -0,0 +1,217 @@
+# Standard library imports
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+from typing import Any, Callable, Dict, IO, List, Optional, Tuple
+
+# Local application imports
+from app.config import settings
+from app.services.search_job import SearchJob
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.ndjson"
+# Rows per snapshot line, keeps single lines a manageable size for big queues
+SNAPSHOT_CHUNK = 10000
+_SEGMENT = re.compile(r"journal\.(\d+)\.ndjson$")
+
+Row = Tuple[Any, ...]
+
+_encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+
+def _encode_batch(rows: List[Row], deleted: List[str]) -> bytes:
+    # One encode call per batch stays in the C encoder instead of looping per job in Python
+    return (_encoder.encode({"put": rows, "del": deleted}) + "\n").encode()
+
+def _fsync_directory(directory: str) -> None:
+    # Makes renames and new files durable; not every platform can open a directory
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class QueueJournal:
+    """Append-only journal plus periodic snapshot of the in-memory queue
+
+    Mutations only mark a job dirty; a background task writes the latest
+    state of every dirty job and fsyncs once per `flush_interval` (group
+    commit), so a crash loses at most that window. Each commit is one NDJSON
+    line holding SearchJob.to_row() for the jobs that changed and the ids of
+    jobs that left the queue; a line torn by a crash is skipped as a whole.
+    Every `snapshot_every` records the whole queue is written to a snapshot
+    and older journal segments are deleted. Startup loads the snapshot and
+    replays the segments written after it.
+    """
+
+    def __init__(self, directory: str, flush_interval: Optional[float] = None, snapshot_every: Optional[int] = None):
+        self.directory = directory
+        self.flush_interval = settings.QUEUE_JOURNAL_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.snapshot_every = snapshot_every or settings.QUEUE_SNAPSHOT_EVERY
+        os.makedirs(directory, exist_ok=True)
+        # job_id -> job to write, or None to record that the job left the queue
+        self._dirty: Dict[str, Optional[SearchJob]] = {}
+        self._segment = max(self._segments(), default=0)
+        self._file: Optional[IO[bytes]] = None
+        self._since_snapshot = 0
+        self._snapshot_source: Optional[Callable[[], List[Row]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        # A failed write may have left half a line behind; the next one starts on a fresh line
+        self._torn = False
+        self.records_written = 0
+        self.snapshots_written = 0
+
+    def _segments(self) -> List[int]:
+        segments = []
+        for path in glob.glob(os.path.join(self.directory, "journal.*.ndjson")):
+            match = _SEGMENT.search(path)
+            if match:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"journal.{segment}.ndjson")
+
+    def put(self, job: SearchJob) -> None:
+        self._dirty[job.job_id] = job
+
+    def delete(self, job_id: str) -> None:
+        self._dirty[job_id] = None
+
+    def load(self) -> List[SearchJob]:
+        """Jobs as of the last durable write: the snapshot, then every later journal record"""
+        state: Dict[str, list] = {}
+        first_segment = 0
+        snapshot = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot):
+            with open(snapshot, "rb") as f:
+                first_segment = json.loads(f.readline())["segment"]
+                self._replay(f, state, SNAPSHOT_FILE)
+
+        for segment in self._segments():
+            if segment >= first_segment:
+                with open(self._segment_path(segment), "rb") as f:
+                    self._replay(f, state, f"journal segment {segment}")
+        return [SearchJob.from_row(row) for row in state.values()]
+
+    @staticmethod
+    def _replay(lines: IO[bytes], state: Dict[str, list], source: str) -> None:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                batch = json.loads(line)
+            except ValueError:
+                # A commit torn by a crash mid-write was never acknowledged; everything before it is intact
+                logger.warning("Skipping unreadable batch in %s", source)
+                continue
+            for row in batch["put"]:
+                state[row[0]] = row
+            for job_id in batch["del"]:
+                state.pop(job_id, None)
+
+    def start(self, snapshot_source: Callable[[], List[Row]]) -> None:
+        """Begin group commits; `snapshot_source` returns SearchJob.to_row() for every job in the queue"""
+        self._snapshot_source = snapshot_source
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), "ab")
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Flush what is pending and leave a fresh snapshot so the next start replays almost nothing"""
+        if self._task is not None:
+            # Not cancelled: a write may be running in the executor and must finish first
+            self._stopping.set()
+            await self._task
+            self._task = None
+        if self._file is not None:
+            await self.snapshot()
+            self._file.close()
+            self._file = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+                if self._since_snapshot >= self.snapshot_every:
+                    await self.snapshot()
+            except Exception:
+                logger.exception("Queue journal write failed")
+
+    async def flush(self) -> None:
+        if not self._dirty or self._file is None:
+            return
+        dirty, self._dirty = self._dirty, {}
+        # Rows are captured on the loop, where jobs are mutated; encoding and fsync happen off it
+        rows = [job.to_row() for job in dirty.values() if job is not None]
+        deleted = [job_id for job_id, job in dirty.items() if job is None]
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, self._file, rows, deleted, self._torn)
+        except BaseException:
+            # Written again with the next flush; anything marked since is newer and wins
+            for job_id, job in dirty.items():
+                self._dirty.setdefault(job_id, job)
+            self._torn = True
+            raise
+        self._torn = False
+        self._since_snapshot += len(dirty)
+        self.records_written += len(dirty)
+
+    @staticmethod
+    def _write(file: IO[bytes], rows: List[Row], deleted: List[str], torn: bool = False) -> None:
+        if torn:
+            file.write(b"\n")
+        file.write(_encode_batch(rows, deleted))
+        file.flush()
+        os.fsync(file.fileno())
+
+    async def snapshot(self) -> None:
+        if self._snapshot_source is None or self._file is None:
+            return
+        await self.flush()
+        rows = self._snapshot_source()
+        # Later records go to a new segment; the snapshot covers everything before it
+        old_file = self._file
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), "ab")
+        self._since_snapshot = 0
+        await asyncio.get_running_loop().run_in_executor(None, self._write_snapshot, rows, self._segment, old_file)
+        self.snapshots_written += 1
+
+    def _write_snapshot(self, rows: List[Row], segment: int, old_file: IO[bytes]) -> None:
+        old_file.close()
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write((_encoder.encode({"segment": segment}) + "\n").encode())
+            for start in range(0, len(rows), SNAPSHOT_CHUNK):
+                f.write(_encode_batch(rows[start:start + SNAPSHOT_CHUNK], []))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_directory(self.directory)
+        for old in self._segments():
+            if old < segment:
+                os.remove(self._segment_path(old))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "segment": self._segment,
+            "pending": len(self._dirty),
+            "records_written": self.records_written,
+            "records_since_snapshot": self._since_snapshot,
+            "snapshots_written": self.snapshots_written
+        }
@@ -1,109 +1,527 @@
 # Standard library imports
 import asyncio
-from collections import deque
-from datetime import datetime
-from typing import Dict, Any, Optional
-
-class SearchJob:
-    def __init__(self, job_id: str, instance_id: int, episode_id: int, series_id: int, 
-                 season_number: int, episode_number: int, priority: int = 0, delay: int = 0):
-        self.job_id = job_id
+import itertools
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Set, Tuple
+
+# Local application imports
+from app.config import settings
+from app.core.database import run_db
+from app.services.job_archive import JobArchive
+from app.services.queue_journal import QueueJournal
+from app.services.search_job import ACTIVE_STATUSES, TERMINAL_STATUSES, JobStatus, SearchJob
+from app.utils.retry import RetryConfig, RetryHandler
+from app.utils.scheduler import FairScheduler
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = tuple(status.value for status in JobStatus)
+
+# Evict in chunks so the archive sees batched writes rather than one row per finished job
+EVICTION_BATCH = 500
+AGE_SWEEP_INTERVAL = 60
+# Jobs added between yields to the event loop while a bulk enqueue holds a shard lock
+BULK_YIELD_EVERY = 500
+
+class QueueShard:
+    """The slice of queue state that belongs to one instance, guarded by its own lock
+
+    Mutations for an instance only serialize against each other, so a bulk
+    enqueue for one instance doesn't hold up completions or enqueues for another.
+    """
+
+    def __init__(self, instance_id: int):
         self.instance_id = instance_id
-        self.episode_id = episode_id
-        self.series_id = series_id
-        self.season_number = season_number
-        self.episode_number = episode_number
-        self.priority = priority
-        self.delay = delay
-        self.created_at = datetime.utcnow()
-        self.status = "queued"
-        self.retry_count = 0
-        self.last_attempt = None
-        self.error = None
-
-    def to_dict(self) -> Dict[str, Any]:
+        self.lock = asyncio.Lock()
+        # episode_id -> job id of the queued/processing search for it
+        self.active: Dict[int, str] = {}
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @asynccontextmanager
+    async def locked(self) -> AsyncIterator['QueueShard']:
+        """Hold the shard lock, counting how often and how long callers had to wait for it"""
+        self.acquisitions += 1
+        if self.lock.locked():
+            self.contended += 1
+            started = time.monotonic()
+            await self.lock.acquire()
+            waited = time.monotonic() - started
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        else:
+            await self.lock.acquire()
+        try:
+            yield self
+        finally:
+            self.lock.release()
+
+    def stats(self) -> Dict[str, Any]:
         return {
-            "job_id": self.job_id,
-            "instance_id": self.instance_id,
-            "episode_id": self.episode_id,
-            "series_id": self.series_id,
-            "season_number": self.season_number,
-            "episode_number": self.episode_number,
-            "priority": self.priority,
-            "delay": self.delay,
-            "created_at": self.created_at.isoformat(),
-            "status": self.status,
-            "retry_count": self.retry_count,
-            "last_attempt": self.last_attempt.isoformat() if self.last_attempt else None,
-            "error": self.error
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "wait_ms_total": round(self.wait_total * 1000, 1),
+            "wait_ms_max": round(self.wait_max * 1000, 1)
         }
 
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'SearchJob':
-        job = cls(
-            job_id=data["job_id"],
-            instance_id=data["instance_id"],
-            episode_id=data["episode_id"],
-            series_id=data["series_id"],
-            season_number=data["season_number"],
-            episode_number=data["episode_number"],
-            priority=data["priority"],
-            delay=data["delay"]
-        )
-        job.created_at = datetime.fromisoformat(data["created_at"])
-        job.status = data["status"]
-        job.retry_count = data["retry_count"]
-        job.last_attempt = datetime.fromisoformat(data["last_attempt"]) if data["last_attempt"] else None
-        job.error = data["error"]
-        return job
-
 class QueueService:
-    def __init__(self):
-        self.queue = deque()
-        self.processing = deque()
-        self.jobs: Dict[str, Dict[str, Any]] = {}
-        self.lock = asyncio.Lock()
+    def __init__(
+        self,
+        archive: Optional[JobArchive] = None,
+        max_history: Optional[int] = None,
+        max_history_age: Optional[int] = None,
+        retry_config: Optional[RetryConfig] = None,
+        journal: Optional[QueueJournal] = None,
+        max_dead_letters: Optional[int] = None,
+        max_dead_letter_age: Optional[int] = None
+    ):
+        self.archive = archive
+        self.journal = journal
+        self.retry = RetryHandler(retry_config or RetryConfig(
+            initial_delay=settings.SEARCH_RETRY_INITIAL_DELAY,
+            max_delay=settings.SEARCH_RETRY_MAX_DELAY,
+            max_retries=settings.SEARCH_RETRY_MAX,
+            backoff_factor=settings.SEARCH_RETRY_BACKOFF,
+            jitter=True
+        ))
+        self.max_history = settings.JOB_HISTORY_MAX_JOBS if max_history is None else max_history
+        self.max_history_age = settings.JOB_HISTORY_MAX_AGE if max_history_age is None else max_history_age
+        self.max_dead_letters = settings.DEAD_LETTER_MAX_JOBS if max_dead_letters is None else max_dead_letters
+        self.max_dead_letter_age = settings.DEAD_LETTER_MAX_AGE if max_dead_letter_age is None else max_dead_letter_age
+        self._ids = itertools.count((archive.last_job_id() if archive else 0) + 1)
+        # finished job id -> epoch time it finished, oldest first
+        self._finished: Dict[str, float] = {}
+        # dead-lettered job id -> epoch time it was dead-lettered, oldest first
+        self._dead_letters: Dict[str, float] = {}
+        self._next_age_sweep = 0.0
+        self.archived = 0
+        # Evicted jobs whose archive write hasn't finished, so lookups still find them
+        self._archiving: Dict[str, SearchJob] = {}
+        self._archive_tasks: Set[asyncio.Task] = set()
+        # Fair across instances within each priority level
+        self.scheduler = FairScheduler()
+        self.jobs: Dict[str, SearchJob] = {}
+        # status -> job ids in that status; dicts keep transition order for listings
+        self.by_status: Dict[JobStatus, Dict[str, None]] = {status: {} for status in JobStatus}
+        self._shards: Dict[int, QueueShard] = {}
+        self._job_available = asyncio.Event()
+        self._stats_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self.deduplicated = 0
+        self.deferred = 0
+        self.retries_scheduled = 0
+        if journal is not None:
+            self.restore(journal.load())
+
+    def restore(self, jobs: List[SearchJob]) -> None:
+        """Rebuild the queue from persisted jobs; ones that were processing are queued again"""
+        last_id = 0
+        finished = []
+        dead_letters = []
+        for job in sorted(jobs, key=lambda job: int(job.job_id)):
+            last_id = max(last_id, int(job.job_id))
+            if job.status == JobStatus.PROCESSING:
+                # The worker that claimed it died with the process, so it never ran to completion
+                job.status = JobStatus.QUEUED
+            self.jobs[job.job_id] = job
+            self.by_status[job.status][job.job_id] = None
+            if job.status in ACTIVE_STATUSES:
+                self._shard(job.instance_id).active[job.episode_id] = job.job_id
+                self.scheduler.push(job.job_id, job.instance_id, priority=job.priority, not_before=job.not_before)
+            elif job.status in TERMINAL_STATUSES:
+                finished.append(job)
+            elif job.status == JobStatus.DEAD_LETTER:
+                dead_letters.append(job)
+        # Retention evicts from the front, so these must be oldest first; a job that failed
+        # long after it was created can have a lower id than one that finished before it
+        for job in sorted(finished, key=lambda job: job.updated_at):
+            self._finished[job.job_id] = float(job.updated_at)
+        for job in sorted(dead_letters, key=lambda job: job.updated_at):
+            self._dead_letters[job.job_id] = float(job.updated_at)
+        # The archive only knows evicted jobs; restored ones may have newer ids
+        self._ids = itertools.count(max(next(self._ids), last_id + 1))
+        if self.scheduler:
+            self._job_available.set()
+
+    def snapshot_rows(self) -> List[Tuple[Any, ...]]:
+        """Every job in persistence row form, for the journal snapshot"""
+        return [job.to_row() for job in self.jobs.values()]
+
+    def set_instance_weight(self, instance_id: int, weight: Optional[float]) -> None:
+        """Share of dispatches an instance gets relative to others with work at the same priority"""
+        self.scheduler.set_weight(instance_id, weight)
+
+    def register_stats(self, name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+        """Include the output of `provider` under `name` in get_queue_status"""
+        self._stats_providers[name] = provider
+
+    def _shard(self, instance_id: int) -> QueueShard:
+        shard = self._shards.get(instance_id)
+        if shard is None:
+            shard = self._shards[instance_id] = QueueShard(instance_id)
+        return shard
 
     async def add_search(self, search_data: Dict[str, Any]) -> str:
-        job_id = str(len(self.jobs) + 1)
-        self.jobs[job_id] = {
-            **search_data,
-            "status": "queued",
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
-        }
-        self.queue.append(job_id)
-        return job_id
+        """Queue a search, or merge it into the active job for the same episode and return that job's id
+
+        Raises ValueError if the search data has no usable instance_id/episode_id.
+        """
+        job = SearchJob.from_search("", search_data)
+        async with self._shard(job.instance_id).locked() as shard:
+            return self._add(shard, job)
+
+    async def add_searches(self, searches: List[Dict[str, Any]]) -> List[str]:
+        """Queue many searches, taking each instance's shard lock once
+
+        All searches are validated first, so a ValueError means nothing was queued.
+        Returns the job ids in the order of `searches`.
+        """
+        jobs = [SearchJob.from_search("", search_data) for search_data in searches]
+        by_instance: Dict[int, List[int]] = defaultdict(list)
+        for index, job in enumerate(jobs):
+            by_instance[job.instance_id].append(index)
 
-    async def get_next_job(self) -> Optional[Dict[str, Any]]:
-        async with self.lock:
-            if not self.queue:
+        job_ids: List[str] = [""] * len(jobs)
+        for instance_id, indexes in by_instance.items():
+            async with self._shard(instance_id).locked() as shard:
+                for count, index in enumerate(indexes, 1):
+                    job_ids[index] = self._add(shard, jobs[index])
+                    if count % BULK_YIELD_EVERY == 0:
+                        # Let workers dequeue (and other instances enqueue) during a large import
+                        await asyncio.sleep(0)
+        return job_ids
+
+    def _add(self, shard: QueueShard, job: SearchJob) -> str:
+        existing_id = shard.active.get(job.episode_id)
+        if existing_id is not None:
+            existing = self.jobs.get(existing_id)
+            if existing is not None and existing.status in ACTIVE_STATUSES:
+                self._merge(existing, job.priority, job.not_before)
+                self.deduplicated += 1
+                return existing_id
+
+        job.job_id = str(next(self._ids))
+        self.jobs[job.job_id] = job
+        self.by_status[JobStatus.QUEUED][job.job_id] = None
+        shard.active[job.episode_id] = job.job_id
+        self.scheduler.push(job.job_id, job.instance_id, priority=job.priority, not_before=job.not_before)
+        if self.journal is not None:
+            self.journal.put(job)
+        self._job_available.set()
+        return job.job_id
+
+    async def retry_job(self, job_id: str) -> Optional[str]:
+        """Queue a fresh search with the same search data as an existing job"""
+        job = self.jobs.get(job_id) or self._archiving.get(job_id)
+        if job is not None:
+            return await self.add_search(job.search_data())
+        archived = await run_db(self.archive.get, job_id) if self.archive is not None else None
+        if archived is None:
+            return None
+        return await self.add_search(SearchJob.from_dict(archived).search_data())
+
+    def _merge(self, job: SearchJob, priority: int, not_before: float) -> None:
+        # A running search already covers the duplicate; only a queued one can be moved up
+        if job.status != JobStatus.QUEUED:
+            return
+        if priority <= job.priority and not_before >= job.not_before:
+            return
+        job.priority = max(job.priority, priority)
+        job.not_before = min(job.not_before, not_before)
+        job.touch()
+        self.scheduler.push(job.job_id, job.instance_id, priority=job.priority, not_before=job.not_before)
+        if self.journal is not None:
+            self.journal.put(job)
+        self._job_available.set()
+
+    def _release(self, job: SearchJob) -> None:
+        active = self._shard(job.instance_id).active
+        if active.get(job.episode_id) == job.job_id:
+            del active[job.episode_id]
+
+    async def get_next_job(self, eligible: Optional[Callable[[int], bool]] = None) -> Optional[SearchJob]:
+        """Claim the next ready job, only for instances `eligible` accepts when it is given"""
+        # Claiming is one synchronous pop + transition, so the dispatcher takes no lock and never
+        # waits behind a shard; shard critical sections don't await, so they can't be caught halfway
+        while True:
+            job_id = self.scheduler.pop(eligible=eligible)
+            if job_id is None:
                 return None
-            
-            job_id = self.queue.popleft()
             job = self.jobs[job_id]
-            job["status"] = "processing"
-            job["updated_at"] = datetime.utcnow().isoformat()
-            self.processing.append(job_id)
-            return job
+            if job.status == JobStatus.QUEUED:
+                break
+
+        job.last_attempt = int(time.time())
+        self._transition(job, JobStatus.PROCESSING)
+        return job
+
+    async def wait_for_job(self, timeout: Optional[float] = None,
+                           eligible: Optional[Callable[[int], bool]] = None) -> Optional[SearchJob]:
+        """Wait until a job is ready and claim it, returns None if the timeout expires first
+
+        Jobs of instances `eligible` turns down are left queued; call wake() once
+        one of them may be accepted, the wait does not poll for it.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            job = await self.get_next_job(eligible)
+            if job is not None:
+                return job
+
+            ready_at = self.scheduler.next_ready_at(eligible=eligible)
+            wait = None if ready_at is None else max(ready_at - time.time(), 0.0)
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                wait = remaining if wait is None else min(wait, remaining)
+
+            self._job_available.clear()
+            try:
+                await asyncio.wait_for(self._job_available.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def wake(self) -> None:
+        """Make waiting claimers look at the queue again, e.g. after an instance frees a slot"""
+        self._job_available.set()
 
     async def complete_job(self, job_id: str, result: Dict[str, Any]) -> None:
-        async with self.lock:
-            if job_id in self.processing:
-                self.processing.remove(job_id)
-            if job_id in self.jobs:
-                self.jobs[job_id].update({
-                    "status": "completed",
-                    "result": result,
-                    "updated_at": datetime.utcnow().isoformat()
-                })
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        async with self._shard(job.instance_id).locked():
+            if job.status == JobStatus.PROCESSING:
+                self._release(job)
+                job.result = result
+                self._transition(job, JobStatus.COMPLETED)
+
+    async def fail_job(self, job_id: str, error: str, retryable: bool = True) -> Optional[float]:
+        """Record a failed attempt, returns the backoff delay if the job was rescheduled
+
+        A retryable failure goes back on the queue after an exponential backoff
+        until `max_retries` retries are used up, then the job is dead-lettered.
+        Non-retryable failures are final.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        async with self._shard(job.instance_id).locked():
+            if job.status != JobStatus.PROCESSING:
+                return None
+            job.error = error
+            if not retryable:
+                self._release(job)
+                self._transition(job, JobStatus.FAILED)
+                return None
+            if not self.retry.should_retry(job.retry_count):
+                self._release(job)
+                self._transition(job, JobStatus.DEAD_LETTER)
+                return None
+
+            job.retry_count += 1
+            delay = self.retry.compute_delay(job.retry_count)
+            job.not_before = time.time() + delay
+            self._transition(job, JobStatus.QUEUED)
+            self.scheduler.push(job_id, job.instance_id, priority=job.priority, not_before=job.not_before)
+            self.retries_scheduled += 1
+        self._job_available.set()
+        return delay
+
+    async def requeue_dead_letters(
+        self,
+        job_ids: Optional[List[str]] = None,
+        instance_id: Optional[int] = None
+    ) -> List[str]:
+        """Queue dead-lettered jobs again with a fresh retry budget, returns the requeued job ids
+
+        Without `job_ids` every dead-lettered job (of `instance_id`, if given) is
+        requeued. A job whose episode has been queued again in the meantime is
+        merged into that job and cancelled instead.
+        """
+        candidates = list(self.by_status[JobStatus.DEAD_LETTER]) if job_ids is None else job_ids
+        by_instance: Dict[int, List[SearchJob]] = defaultdict(list)
+        for job_id in candidates:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != JobStatus.DEAD_LETTER:
+                continue
+            if instance_id is None or job.instance_id == instance_id:
+                by_instance[job.instance_id].append(job)
+
+        requeued = []
+        now = time.time()
+        for shard_id, jobs in by_instance.items():
+            async with self._shard(shard_id).locked() as shard:
+                for job in jobs:
+                    if job.status != JobStatus.DEAD_LETTER:
+                        continue
+                    existing = self.jobs.get(shard.active.get(job.episode_id))
+                    if existing is not None and existing.status in ACTIVE_STATUSES:
+                        self._merge(existing, job.priority, now)
+                        job.error = f"Superseded by job {existing.job_id}"
+                        self._transition(job, JobStatus.CANCELLED)
+                        continue
+
+                    job.retry_count = 0
+                    job.not_before = now
+                    shard.active[job.episode_id] = job.job_id
+                    self._transition(job, JobStatus.QUEUED)
+                    self.scheduler.push(job.job_id, job.instance_id, priority=job.priority, not_before=job.not_before)
+                    requeued.append(job.job_id)
+        if requeued:
+            self._job_available.set()
+        return requeued
+
+    async def defer_job(self, job_id: str, delay: float, reason: Optional[str] = None) -> None:
+        """Put a processing job back in the queue, ready again after `delay` seconds"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        async with self._shard(job.instance_id).locked():
+            if job.status != JobStatus.PROCESSING:
+                return
+            job.not_before = time.time() + delay
+            job.error = reason
+            self._transition(job, JobStatus.QUEUED)
+            self.scheduler.push(job_id, job.instance_id, priority=job.priority, not_before=job.not_before)
+            self.deferred += 1
+        self._job_available.set()
+
+    async def cancel_job(self, job_id: str) -> bool:
+        """Cancel a queued, processing or dead-lettered job, returns False if it is already finished"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        async with self._shard(job.instance_id).locked():
+            if job.status in TERMINAL_STATUSES:
+                return False
+            self.scheduler.discard(job_id)
+            self._release(job)
+            self._transition(job, JobStatus.CANCELLED)
+            return True
+
+    async def list_jobs(self, status: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[SearchJob]:
+        """List jobs in one status (or all jobs) in the order they entered it"""
+        job_ids = self.jobs if status is None else self.by_status[JobStatus(status)]
+        return [self.jobs[job_id] for job_id in islice(job_ids, offset, offset + limit)]
+
+    def _transition(self, job: SearchJob, status: JobStatus) -> None:
+        if job.status == JobStatus.DEAD_LETTER:
+            self._dead_letters.pop(job.job_id, None)
+        self.by_status[job.status].pop(job.job_id, None)
+        self.by_status[status][job.job_id] = None
+        job.status = status
+        job.touch()
+        if self.journal is not None:
+            self.journal.put(job)
+        if status in TERMINAL_STATUSES:
+            self._finished[job.job_id] = time.time()
+            self._enforce_retention()
+        elif status == JobStatus.DEAD_LETTER:
+            # Kept for requeueing, but not forever: an instance that stays broken would grow it without bound
+            self._dead_letters[job.job_id] = time.time()
+            self._enforce_retention()
+
+    @staticmethod
+    def _over_limits(tracked: Dict[str, float], max_jobs: int, cutoff: float, age_sweep: bool) -> Dict[str, float]:
+        """Oldest entries of `tracked` beyond `max_jobs` or older than `cutoff`, removed from it"""
+        overflow = len(tracked) - max_jobs
+        batch = max(1, min(EVICTION_BATCH, max_jobs // 10))
+        if overflow < batch and not age_sweep:
+            return {}
+        evicted = []
+        for job_id, finished_at in tracked.items():
+            if len(evicted) >= overflow and finished_at >= cutoff:
+                break
+            evicted.append(job_id)
+        return {job_id: tracked.pop(job_id) for job_id in evicted}
+
+    def _enforce_retention(self) -> None:
+        now = time.time()
+        age_sweep = now >= self._next_age_sweep
+        if age_sweep:
+            self._next_age_sweep = now + AGE_SWEEP_INTERVAL
+
+        finished_at = self._over_limits(self._finished, self.max_history, now - self.max_history_age, age_sweep)
+        finished_at.update(self._over_limits(
+            self._dead_letters, self.max_dead_letters, now - self.max_dead_letter_age, age_sweep
+        ))
+        if not finished_at:
+            return
+        jobs = []
+        for job_id in finished_at:
+            job = self.jobs.pop(job_id)
+            self.by_status[job.status].pop(job_id, None)
+            if self.journal is not None:
+                self.journal.delete(job_id)
+            jobs.append(job)
+        if self.archive is not None:
+            # Written in the background; eviction runs inside queue mutations on the event loop
+            for job in jobs:
+                self._archiving[job.job_id] = job
+            task = asyncio.ensure_future(self._archive(jobs, finished_at))
+            self._archive_tasks.add(task)
+            task.add_done_callback(self._archive_tasks.discard)
+        self.archived += len(jobs)
+
+    async def _archive(self, jobs: List[SearchJob], finished_at: Dict[str, float]) -> None:
+        try:
+            await run_db(self.archive.store, jobs, finished_at)
+        except Exception:
+            logger.exception("Archiving %d evicted jobs failed", len(jobs))
+        finally:
+            for job in jobs:
+                self._archiving.pop(job.job_id, None)
+
+    async def close(self) -> None:
+        """Wait for evicted jobs to reach the archive"""
+        await asyncio.gather(*self._archive_tasks, return_exceptions=True)
 
     async def get_queue_status(self) -> Dict[str, Any]:
+        status: Dict[str, Any] = await self.counts()
+        status.update({
+            "backend": "memory",
+            "total_jobs": len(self.jobs),
+            "backlog_by_instance": self.scheduler.backlog(),
+            "deduplicated": self.deduplicated,
+            "deferred": self.deferred,
+            "retries_scheduled": self.retries_scheduled,
+            "archived": self.archived,
+            "locks": self.lock_stats()
+        })
+        for name, provider in self._stats_providers.items():
+            status[name] = provider()
+        return status
+
+    async def heartbeat(self, job_ids: List[str]) -> int:
+        """Jobs in a single-process queue are never leased, so there is nothing to extend"""
+        return len(job_ids)
+
+    async def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        return {status.value: len(job_ids) for status, job_ids in self.by_status.items()}
+
+    def lock_stats(self) -> Dict[str, Any]:
+        """Shard lock contention, overall and per instance"""
+        shards = {instance_id: shard.stats() for instance_id, shard in self._shards.items()}
         return {
-            "queued": len(self.queue),
-            "processing": len(self.processing),
-            "total_jobs": len(self.jobs)
+            "acquisitions": sum(shard.acquisitions for shard in self._shards.values()),
+            "contended": sum(shard.contended for shard in self._shards.values()),
+            "wait_ms_total": round(sum(shard.wait_total for shard in self._shards.values()) * 1000, 1),
+            "wait_ms_max": round(max((shard.wait_max for shard in self._shards.values()), default=0.0) * 1000, 1),
+            "by_instance": shards
         }
 
     async def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
-        return self.jobs.get(job_id) 
\ No newline at end of file
+        job = self.jobs.get(job_id) or self._archiving.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.archive is not None:
+            return await run_db(self.archive.get, job_id)
+        return None
@@ -0,0 +1,192 @@
+# Standard library imports
+import json
+import time
+from datetime import datetime
+from enum import Enum
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    # Out of retries; neither active nor archived, kept until requeued or cancelled
+    DEAD_LETTER = "dead_letter"
+
+ACTIVE_STATUSES = frozenset({JobStatus.QUEUED, JobStatus.PROCESSING})
+TERMINAL_STATUSES = frozenset({JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED})
+
+# Submitted fields that map onto SearchJob attributes; anything else is kept in `extra`
+SEARCH_FIELDS = ("instance_id", "episode_id", "series_id", "season_number", "episode_number", "priority", "delay")
+
+# Column order used by SearchJob.to_row / from_row
+ROW_FIELDS = (
+    "job_id", "instance_id", "episode_id", "series_id", "season_number", "episode_number",
+    "priority", "delay", "not_before", "created_at", "updated_at", "status",
+    "retry_count", "last_attempt", "error", "result", "extra"
+)
+_STATUS_COLUMN = ROW_FIELDS.index("status")
+_get_row = attrgetter(*ROW_FIELDS)
+
+def _iso(timestamp: Optional[int]) -> Optional[str]:
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+def _epoch(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        return int((value - datetime(1970, 1, 1)).total_seconds())
+    return _epoch(datetime.fromisoformat(value))
+
+def _optional_int(value: Any) -> Optional[int]:
+    return int(value) if value is not None else None
+
+class SearchJob:
+    """A queued episode search
+
+    Slotted, with epoch-second timestamps and an enum status, so a large queue
+    costs a fraction of the memory of one dict per job.
+    """
+
+    __slots__ = ROW_FIELDS
+
+    def __init__(self, job_id: str, instance_id: int, episode_id: int, series_id: Optional[int] = None,
+                 season_number: Optional[int] = None, episode_number: Optional[int] = None,
+                 priority: int = 0, delay: float = 0):
+        now = time.time()
+        self.job_id = job_id
+        self.instance_id = instance_id
+        self.episode_id = episode_id
+        self.series_id = series_id
+        self.season_number = season_number
+        self.episode_number = episode_number
+        self.priority = priority
+        self.delay = delay
+        self.not_before = now + delay
+        self.created_at = int(now)
+        self.updated_at = int(now)
+        self.status = JobStatus.QUEUED
+        self.retry_count = 0
+        self.last_attempt: Optional[int] = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_search(cls, job_id: str, search_data: Dict[str, Any]) -> 'SearchJob':
+        """Build a job from submitted search data, raises ValueError if it has no instance or episode"""
+        if search_data.get("instance_id") is None or search_data.get("episode_id") is None:
+            raise ValueError("Search requires instance_id and episode_id")
+        try:
+            job = cls(
+                job_id=job_id,
+                instance_id=int(search_data["instance_id"]),
+                episode_id=int(search_data["episode_id"]),
+                series_id=_optional_int(search_data.get("series_id")),
+                season_number=_optional_int(search_data.get("season_number")),
+                episode_number=_optional_int(search_data.get("episode_number")),
+                priority=int(search_data.get("priority") or 0),
+                delay=float(search_data.get("delay") or 0)
+            )
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid search data: {e}")
+        extra = {k: v for k, v in search_data.items() if k not in SEARCH_FIELDS}
+        job.extra = extra or None
+        return job
+
+    def search_data(self) -> Dict[str, Any]:
+        """The submitted fields needed to queue this search again"""
+        data = dict(self.extra or {})
+        data.update({
+            "instance_id": self.instance_id,
+            "episode_id": self.episode_id,
+            "series_id": self.series_id,
+            "season_number": self.season_number,
+            "episode_number": self.episode_number,
+            "priority": self.priority
+        })
+        return data
+
+    def touch(self) -> None:
+        self.updated_at = int(time.time())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._as_dict(_iso)
+
+    def _as_dict(self, iso: Callable[[Optional[int]], Optional[str]]) -> Dict[str, Any]:
+        data = dict(self.extra) if self.extra else {}
+        data.update({
+            "job_id": self.job_id,
+            "instance_id": self.instance_id,
+            "episode_id": self.episode_id,
+            "series_id": self.series_id,
+            "season_number": self.season_number,
+            "episode_number": self.episode_number,
+            "priority": self.priority,
+            "delay": self.delay,
+            "not_before": self.not_before,
+            "created_at": iso(self.created_at),
+            "updated_at": iso(self.updated_at),
+            "status": self.status.value,
+            "retry_count": self.retry_count,
+            "last_attempt": iso(self.last_attempt),
+            "error": self.error,
+            "result": self.result
+        })
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SearchJob':
+        job = cls(
+            job_id=data["job_id"],
+            instance_id=data["instance_id"],
+            episode_id=data["episode_id"],
+            series_id=data.get("series_id"),
+            season_number=data.get("season_number"),
+            episode_number=data.get("episode_number"),
+            priority=data.get("priority", 0),
+            delay=data.get("delay", 0)
+        )
+        job.not_before = data.get("not_before", job.not_before)
+        job.created_at = _epoch(data["created_at"])
+        job.updated_at = _epoch(data.get("updated_at")) or job.created_at
+        job.status = JobStatus(data["status"])
+        job.retry_count = data.get("retry_count", 0)
+        job.last_attempt = _epoch(data.get("last_attempt"))
+        job.error = data.get("error")
+        job.result = data.get("result")
+        extra = {k: v for k, v in data.items() if k not in ROW_FIELDS}
+        job.extra = extra or None
+        return job
+
+    def to_row(self) -> Tuple[Any, ...]:
+        """Positional form in ROW_FIELDS order, the compact shape used for persistence"""
+        row = list(_get_row(self))
+        row[_STATUS_COLUMN] = self.status.value
+        return tuple(row)
+
+    @classmethod
+    def from_row(cls, row: Iterable[Any]) -> 'SearchJob':
+        job = cls.__new__(cls)
+        for field, value in zip(ROW_FIELDS, row):
+            setattr(job, field, value)
+        job.status = JobStatus(job.status)
+        return job
+
+def encode_jobs(jobs: Iterable[SearchJob]) -> str:
+    """Serialize many jobs to a JSON array in one pass, formatting each distinct timestamp only once"""
+    formatted: Dict[int, str] = {}
+
+    def iso(timestamp: Optional[int]) -> Optional[str]:
+        if timestamp is None:
+            return None
+        value = formatted.get(timestamp)
+        if value is None:
+            value = formatted[timestamp] = _iso(timestamp)
+        return value
+
+    return json.dumps([job._as_dict(iso) for job in jobs], separators=(",", ":"), default=str)
@@ -0,0 +1,665 @@
+# Standard library imports
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+# Local application imports
+from app.config import settings
+from app.core.database import run_db
+from app.services.job_archive import JobArchive
+from app.services.search_job import ROW_FIELDS, TERMINAL_STATUSES, JobStatus, SearchJob
+from app.utils.retry import RetryConfig, RetryHandler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Jobs removed by a sweep and when each finished, waiting to be archived
+Swept = Tuple[List[SearchJob], Dict[str, float]]
+
+_COLUMNS = ", ".join(ROW_FIELDS)
+_PLACEHOLDERS = ", ".join("?" for _ in ROW_FIELDS)
+_JOB_ID = ROW_FIELDS.index("job_id")
+_RESULT = ROW_FIELDS.index("result")
+_EXTRA = ROW_FIELDS.index("extra")
+
+_ACTIVE = "('queued', 'processing')"
+_TERMINAL = "(" + ", ".join(f"'{status.value}'" for status in TERMINAL_STATUSES) + ")"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS search_jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    instance_id INTEGER NOT NULL,
+    episode_id INTEGER NOT NULL,
+    series_id INTEGER,
+    season_number INTEGER,
+    episode_number INTEGER,
+    priority INTEGER NOT NULL DEFAULT 0,
+    delay REAL NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL,
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    retry_count INTEGER NOT NULL DEFAULT 0,
+    last_attempt INTEGER,
+    error TEXT,
+    result TEXT,
+    extra TEXT,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    finished_at REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_search_jobs_active_episode
+    ON search_jobs (instance_id, episode_id) WHERE status IN {_ACTIVE};
+CREATE INDEX IF NOT EXISTS ix_search_jobs_ready ON search_jobs (status, priority, not_before);
+CREATE INDEX IF NOT EXISTS ix_search_jobs_due ON search_jobs (status, not_before);
+CREATE INDEX IF NOT EXISTS ix_search_jobs_instance ON search_jobs (instance_id, status, priority, job_id);
+CREATE INDEX IF NOT EXISTS ix_search_jobs_lease ON search_jobs (status, lease_expires_at);
+CREATE INDEX IF NOT EXISTS ix_search_jobs_finished ON search_jobs (finished_at);
+CREATE TABLE IF NOT EXISTS queue_instances (
+    instance_id INTEGER PRIMARY KEY,
+    weight REAL NOT NULL DEFAULT 1.0,
+    vtime REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS queue_meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+def _to_sql(job: SearchJob) -> Tuple[Any, ...]:
+    row = list(job.to_row())
+    row[_JOB_ID] = int(job.job_id) if job.job_id else None
+    row[_RESULT] = json.dumps(row[_RESULT], default=str) if row[_RESULT] is not None else None
+    row[_EXTRA] = json.dumps(row[_EXTRA], default=str) if row[_EXTRA] is not None else None
+    return tuple(row)
+
+def _from_sql(row: Tuple[Any, ...]) -> SearchJob:
+    row = list(row)
+    row[_JOB_ID] = str(row[_JOB_ID])
+    row[_RESULT] = json.loads(row[_RESULT]) if row[_RESULT] is not None else None
+    row[_EXTRA] = json.loads(row[_EXTRA]) if row[_EXTRA] is not None else None
+    return SearchJob.from_row(row)
+
+def _job_key(job_id: str) -> Optional[int]:
+    try:
+        return int(job_id)
+    except (TypeError, ValueError):
+        return None
+
+class SharedQueueService:
+    """Search queue kept in a SQLite database (WAL) shared by every process on the host
+
+    Drop-in replacement for QueueService when the API runs with several
+    uvicorn workers. Claiming a job is one BEGIN IMMEDIATE transaction that
+    leases it to this process for QUEUE_VISIBILITY_TIMEOUT seconds; workers
+    extend the lease with heartbeat() while a search runs, and any process
+    puts jobs with an expired lease back in the queue. Dispatch is by
+    priority, then start-time fair queuing across instances using the
+    per-instance weights, so the fairness of FairScheduler holds across
+    processes too.
+
+    sqlite3 calls block, so every query runs on a single thread owned by the
+    queue: the event loop never waits on the write lock, and the connection
+    is only ever used by one thread at a time.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        archive: Optional[JobArchive] = None,
+        max_history: Optional[int] = None,
+        max_history_age: Optional[int] = None,
+        retry_config: Optional[RetryConfig] = None,
+        visibility_timeout: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        max_dead_letters: Optional[int] = None,
+        max_dead_letter_age: Optional[int] = None
+    ):
+        self.path = path or settings.QUEUE_DATABASE_PATH
+        self.archive = archive
+        self.max_history = settings.JOB_HISTORY_MAX_JOBS if max_history is None else max_history
+        self.max_history_age = settings.JOB_HISTORY_MAX_AGE if max_history_age is None else max_history_age
+        self.max_dead_letters = settings.DEAD_LETTER_MAX_JOBS if max_dead_letters is None else max_dead_letters
+        self.max_dead_letter_age = settings.DEAD_LETTER_MAX_AGE if max_dead_letter_age is None else max_dead_letter_age
+        self.visibility_timeout = visibility_timeout or settings.QUEUE_VISIBILITY_TIMEOUT
+        self.poll_interval = poll_interval or settings.QUEUE_POLL_INTERVAL
+        self.retry = RetryHandler(retry_config or RetryConfig(
+            initial_delay=settings.SEARCH_RETRY_INITIAL_DELAY,
+            max_delay=settings.SEARCH_RETRY_MAX_DELAY,
+            max_retries=settings.SEARCH_RETRY_MAX,
+            backoff_factor=settings.SEARCH_RETRY_BACKOFF,
+            jitter=True
+        ))
+        # Identifies this process's leases; a restarted process gets a new one
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._job_available = asyncio.Event()
+        self._stats_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._next_sweep = 0.0
+        self._weights: Dict[int, float] = {}  # last weight written per instance, to skip no-op writes
+        # Jobs swept out of the table whose archive write hasn't finished, so lookups still find them
+        self._archiving: Dict[str, SearchJob] = {}
+        # Counters below are for this process only
+        self.deduplicated = 0
+        self.deferred = 0
+        self.retries_scheduled = 0
+        self.reclaimed = 0
+        self.archived = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-queue")
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        if archive is not None:
+            self._seed_ids(archive.last_job_id())
+
+    def _seed_ids(self, last_archived: int) -> None:
+        # Keep new ids above anything already archived, as the in-memory queue does
+        with self._transaction() as conn:
+            current = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'search_jobs'").fetchone()
+            if current is None:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('search_jobs', ?)", (last_archived,))
+            elif current[0] < last_archived:
+                conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'search_jobs'", (last_archived,))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so read-then-claim can't race another process
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    async def _run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def close(self) -> None:
+        # Queued behind any statement still running, so nothing uses the connection after it closes
+        await self._run(self._conn.close)
+        self._executor.shutdown()
+
+    def set_instance_weight(self, instance_id: int, weight: Optional[float]) -> None:
+        """Share of dispatches an instance gets relative to others with work at the same priority"""
+        weight = max(weight or 1.0, 0.1)
+        if self._weights.get(instance_id) == weight:
+            return
+        self._weights[instance_id] = weight
+        # Not awaited, callers are synchronous; the single queue thread still orders it before later claims
+        self._executor.submit(self._write_weight, instance_id, weight).add_done_callback(self._log_weight_error)
+
+    def _write_weight(self, instance_id: int, weight: float) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO queue_instances (instance_id, weight) VALUES (?, ?) "
+                "ON CONFLICT (instance_id) DO UPDATE SET weight = excluded.weight",
+                (instance_id, weight)
+            )
+
+    def _log_weight_error(self, future: Future) -> None:
+        if future.exception() is not None:
+            logger.error("Saving an instance weight failed: %s", future.exception())
+            # Forget it so the next call writes it again
+            self._weights.clear()
+
+    def register_stats(self, name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+        """Include the output of `provider` under `name` in get_queue_status"""
+        self._stats_providers[name] = provider
+
+    async def add_search(self, search_data: Dict[str, Any]) -> str:
+        """Queue a search, or merge it into the active job for the same episode and return that job's id
+
+        Raises ValueError if the search data has no usable instance_id/episode_id.
+        """
+        job = SearchJob.from_search("", search_data)
+        job_ids = await self._run(self._add_jobs, [job])
+        self._job_available.set()
+        return job_ids[0]
+
+    async def add_searches(self, searches: List[Dict[str, Any]]) -> List[str]:
+        """Queue many searches in one transaction, returns the job ids in the order of `searches`"""
+        jobs = [SearchJob.from_search("", search_data) for search_data in searches]
+        job_ids = await self._run(self._add_jobs, jobs)
+        self._job_available.set()
+        return job_ids
+
+    def _add_jobs(self, jobs: List[SearchJob]) -> List[str]:
+        with self._transaction() as conn:
+            return [self._add(conn, job) for job in jobs]
+
+    def _add(self, conn: sqlite3.Connection, job: SearchJob) -> str:
+        existing = conn.execute(
+            f"SELECT job_id, status, priority, not_before FROM search_jobs "
+            f"WHERE instance_id = ? AND episode_id = ? AND status IN {_ACTIVE}",
+            (job.instance_id, job.episode_id)
+        ).fetchone()
+        if existing is not None:
+            job_id, status, priority, not_before = existing
+            # A running search already covers the duplicate; only a queued one can be moved up
+            if status == JobStatus.QUEUED.value and (job.priority > priority or job.not_before < not_before):
+                conn.execute(
+                    "UPDATE search_jobs SET priority = ?, not_before = ?, updated_at = ? WHERE job_id = ?",
+                    (max(priority, job.priority), min(not_before, job.not_before), int(time.time()), job_id)
+                )
+            self.deduplicated += 1
+            return str(job_id)
+
+        conn.execute("INSERT OR IGNORE INTO queue_instances (instance_id) VALUES (?)", (job.instance_id,))
+        cursor = conn.execute(f"INSERT INTO search_jobs ({_COLUMNS}) VALUES ({_PLACEHOLDERS})", _to_sql(job))
+        return str(cursor.lastrowid)
+
+    async def retry_job(self, job_id: str) -> Optional[str]:
+        """Queue a fresh search with the same search data as an existing job"""
+        job = await self._run(self._get, job_id) or self._archiving.get(job_id)
+        if job is not None:
+            return await self.add_search(job.search_data())
+        archived = await run_db(self.archive.get, job_id) if self.archive is not None else None
+        if archived is None:
+            return None
+        return await self.add_search(SearchJob.from_dict(archived).search_data())
+
+    async def get_next_job(self, eligible: Optional[Callable[[int], bool]] = None) -> Optional[SearchJob]:
+        """Lease the next job to this process, or return None if nothing is ready
+
+        With `eligible` given, only jobs of instances it accepts are considered.
+        It runs on the queue thread, so it should only read simple state.
+        """
+        job, swept = await self._run(self._claim, time.time(), eligible)
+        if swept:
+            await self._archive(*swept)
+        return job
+
+    def _claim(self, now: float, eligible: Optional[Callable[[int], bool]] = None
+               ) -> Tuple[Optional[SearchJob], Optional[Swept]]:
+        """The leased job, if any, and the jobs swept out of the table that still need archiving"""
+        if not self._has_work(now, eligible):
+            # Idle polls stay read-only so they never queue up for the write lock
+            return None, None
+        with self._transaction() as conn:
+            self._reclaim(conn, now)
+            swept = self._maybe_sweep(conn, now)
+            heads = {
+                instance_id: priority
+                for instance_id, priority in self._ready_instances(conn, now)
+                if eligible is None or eligible(instance_id)
+            }
+            if not heads:
+                return None, swept
+            top = max(heads.values())
+            ids = [instance_id for instance_id, priority in heads.items() if priority == top]
+
+            clock = self._meta(conn, "vclock")
+            candidates = conn.execute(
+                f"SELECT instance_id, weight, vtime FROM queue_instances "
+                f"WHERE instance_id IN ({', '.join('?' for _ in ids)})",
+                ids
+            ).fetchall()
+            # Start-time fair queuing: serve the instance whose next job starts earliest in virtual
+            # time; an instance coming back from idle starts at the clock, with no banked credit
+            instance_id, weight, vtime = min(candidates, key=lambda c: (max(c[2], clock), c[0]))
+            job_id = conn.execute(
+                "SELECT job_id FROM search_jobs WHERE instance_id = ? AND status = 'queued' "
+                "AND priority = ? AND not_before <= ? ORDER BY job_id LIMIT 1",
+                (instance_id, top, now)
+            ).fetchone()[0]
+
+            start = max(vtime, clock)
+            conn.execute(
+                "INSERT INTO queue_instances (instance_id, vtime) VALUES (?, ?) "
+                "ON CONFLICT (instance_id) DO UPDATE SET vtime = excluded.vtime",
+                (instance_id, start + 1 / weight)
+            )
+            self._set_meta(conn, "vclock", start)
+            conn.execute(
+                "UPDATE search_jobs SET status = 'processing', lease_owner = ?, lease_expires_at = ?, "
+                "last_attempt = ?, updated_at = ? WHERE job_id = ?",
+                (self.owner, now + self.visibility_timeout, int(now), int(now), job_id)
+            )
+            return self._get(str(job_id), conn), swept
+
+    async def wait_for_job(self, timeout: Optional[float] = None,
+                           eligible: Optional[Callable[[int], bool]] = None) -> Optional[SearchJob]:
+        """Wait until a job is ready and claim it, returns None if the timeout expires first
+
+        Jobs added by other processes are noticed by polling every QUEUE_POLL_INTERVAL.
+        Jobs of instances `eligible` turns down are left queued for the next poll or wake().
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            job = await self.get_next_job(eligible)
+            if job is not None:
+                return job
+
+            wait = self.poll_interval
+            ready_at = await self._run(self._next_ready_at, eligible)
+            if ready_at is not None:
+                wait = min(wait, max(ready_at - time.time(), 0.0))
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                wait = min(wait, remaining)
+
+            self._job_available.clear()
+            try:
+                await asyncio.wait_for(self._job_available.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _has_work(self, now: float, eligible: Optional[Callable[[int], bool]] = None) -> bool:
+        if eligible is None:
+            row = self._conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM search_jobs WHERE status = 'queued' AND not_before <= ?) "
+                "OR EXISTS (SELECT 1 FROM search_jobs WHERE status = 'processing' AND lease_expires_at < ?)",
+                (now, now)
+            ).fetchone()
+            return bool(row[0])
+        row = self._conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM search_jobs WHERE status = 'processing' AND lease_expires_at < ?)",
+            (now,)
+        ).fetchone()
+        return bool(row[0]) or any(eligible(instance_id) for instance_id, _ in self._ready_instances(self._conn, now))
+
+    @staticmethod
+    def _ready_instances(conn: sqlite3.Connection, now: float) -> List[Tuple[int, int]]:
+        """(instance_id, top priority) of every instance with a ready job"""
+        return conn.execute(
+            "SELECT instance_id, MAX(priority) FROM search_jobs WHERE status = 'queued' AND not_before <= ? "
+            "GROUP BY instance_id",
+            (now,)
+        ).fetchall()
+
+    def _next_ready_at(self, eligible: Optional[Callable[[int], bool]] = None) -> Optional[float]:
+        if eligible is None:
+            row = self._conn.execute("SELECT MIN(not_before) FROM search_jobs WHERE status = 'queued'").fetchone()
+            return row[0]
+        rows = self._conn.execute(
+            "SELECT instance_id, MIN(not_before) FROM search_jobs WHERE status = 'queued' GROUP BY instance_id"
+        ).fetchall()
+        times = [ready_at for instance_id, ready_at in rows if eligible(instance_id)]
+        return min(times) if times else None
+
+    def wake(self) -> None:
+        """Make waiting claimers look at the queue again, e.g. after an instance frees a slot"""
+        self._job_available.set()
+
+    async def heartbeat(self, job_ids: List[str]) -> int:
+        """Extend this process's leases on running jobs, returns how many are still held"""
+        keys = [key for key in map(_job_key, job_ids) if key is not None]
+        if not keys:
+            return 0
+        return await self._run(self._extend_leases, keys)
+
+    def _extend_leases(self, keys: List[int]) -> int:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE search_jobs SET lease_expires_at = ? WHERE status = 'processing' AND lease_owner = ? "
+                f"AND job_id IN ({', '.join('?' for _ in keys)})",
+                (time.time() + self.visibility_timeout, self.owner, *keys)
+            )
+            return cursor.rowcount
+
+    def _reclaim(self, conn: sqlite3.Connection, now: float) -> None:
+        # A lapsed lease means the worker died or hung; count it as a failed attempt so a job
+        # that keeps killing workers ends up dead-lettered instead of looping forever
+        max_retries = self.retry.config.max_retries
+        cursor = conn.execute(
+            "UPDATE search_jobs SET "
+            "status = CASE WHEN retry_count < ? THEN 'queued' ELSE 'dead_letter' END, "
+            "retry_count = CASE WHEN retry_count < ? THEN retry_count + 1 ELSE retry_count END, "
+            "finished_at = CASE WHEN retry_count < ? THEN finished_at ELSE ? END, "
+            "error = 'Worker lease expired', not_before = ?, lease_owner = NULL, lease_expires_at = NULL, "
+            "updated_at = ? WHERE status = 'processing' AND lease_expires_at < ?",
+            (max_retries, max_retries, max_retries, now, now, int(now), now)
+        )
+        if cursor.rowcount:
+            self.reclaimed += cursor.rowcount
+            logger.warning("Reclaimed %d jobs with expired leases", cursor.rowcount)
+
+    def _finish(self, job_id: str, status: JobStatus, **values: Any) -> bool:
+        """Move a job this process holds out of processing, returns False if the lease was lost"""
+        key = _job_key(job_id)
+        if key is None:
+            return False
+        now = time.time()
+        values.update(status=status.value, updated_at=int(now), lease_owner=None, lease_expires_at=None)
+        if status in TERMINAL_STATUSES or status == JobStatus.DEAD_LETTER:
+            values["finished_at"] = now
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE search_jobs SET {assignments} WHERE job_id = ? AND status = 'processing' AND lease_owner = ?",
+                (*values.values(), key, self.owner)
+            )
+            return cursor.rowcount == 1
+
+    async def complete_job(self, job_id: str, result: Dict[str, Any]) -> None:
+        await self._run(self._finish, job_id, JobStatus.COMPLETED, result=json.dumps(result, default=str))
+
+    async def fail_job(self, job_id: str, error: str, retryable: bool = True) -> Optional[float]:
+        """Record a failed attempt, returns the backoff delay if the job was rescheduled
+
+        Same retry policy as QueueService.fail_job.
+        """
+        job = await self._run(self._get, job_id)
+        if job is None or job.status != JobStatus.PROCESSING:
+            return None
+        if not retryable:
+            await self._run(self._finish, job_id, JobStatus.FAILED, error=error)
+            return None
+        if not self.retry.should_retry(job.retry_count):
+            await self._run(self._finish, job_id, JobStatus.DEAD_LETTER, error=error)
+            return None
+
+        delay = self.retry.compute_delay(job.retry_count + 1)
+        if not await self._run(self._finish, job_id, JobStatus.QUEUED, error=error, retry_count=job.retry_count + 1,
+                               not_before=time.time() + delay):
+            return None
+        self.retries_scheduled += 1
+        self._job_available.set()
+        return delay
+
+    async def defer_job(self, job_id: str, delay: float, reason: Optional[str] = None) -> None:
+        """Put a processing job back in the queue, ready again after `delay` seconds"""
+        if await self._run(self._finish, job_id, JobStatus.QUEUED, error=reason, not_before=time.time() + delay):
+            self.deferred += 1
+            self._job_available.set()
+
+    async def requeue_dead_letters(
+        self,
+        job_ids: Optional[List[str]] = None,
+        instance_id: Optional[int] = None
+    ) -> List[str]:
+        """Queue dead-lettered jobs again with a fresh retry budget, returns the requeued job ids"""
+        query = "SELECT job_id, instance_id, episode_id, priority FROM search_jobs WHERE status = 'dead_letter'"
+        params: List[Any] = []
+        if instance_id is not None:
+            query += " AND instance_id = ?"
+            params.append(instance_id)
+        if job_ids is not None:
+            keys = [key for key in map(_job_key, job_ids) if key is not None]
+            if not keys:
+                return []
+            query += f" AND job_id IN ({', '.join('?' for _ in keys)})"
+            params.extend(keys)
+
+        requeued = await self._run(self._requeue, query, params)
+        if requeued:
+            self._job_available.set()
+        return requeued
+
+    def _requeue(self, query: str, params: List[Any]) -> List[str]:
+        requeued = []
+        now = time.time()
+        with self._transaction() as conn:
+            for job_id, job_instance, episode_id, priority in conn.execute(query, params).fetchall():
+                existing = conn.execute(
+                    f"SELECT job_id FROM search_jobs WHERE instance_id = ? AND episode_id = ? AND status IN {_ACTIVE}",
+                    (job_instance, episode_id)
+                ).fetchone()
+                if existing is not None:
+                    conn.execute(
+                        "UPDATE search_jobs SET priority = MAX(priority, ?), not_before = MIN(not_before, ?) "
+                        "WHERE job_id = ? AND status = 'queued'",
+                        (priority, now, existing[0])
+                    )
+                    conn.execute(
+                        "UPDATE search_jobs SET status = 'cancelled', error = ?, finished_at = ?, updated_at = ? "
+                        "WHERE job_id = ?",
+                        (f"Superseded by job {existing[0]}", now, int(now), job_id)
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE search_jobs SET status = 'queued', retry_count = 0, not_before = ?, finished_at = NULL, "
+                    "updated_at = ? WHERE job_id = ?",
+                    (now, int(now), job_id)
+                )
+                requeued.append(str(job_id))
+        return requeued
+
+    async def cancel_job(self, job_id: str) -> bool:
+        """Cancel a queued, processing or dead-lettered job, returns False if it is already finished"""
+        key = _job_key(job_id)
+        if key is None:
+            return False
+        return await self._run(self._cancel, key)
+
+    def _cancel(self, key: int) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE search_jobs SET status = 'cancelled', lease_owner = NULL, lease_expires_at = NULL, "
+                f"finished_at = ?, updated_at = ? WHERE job_id = ? AND status NOT IN {_TERMINAL}",
+                (now, int(now), key)
+            )
+            return cursor.rowcount == 1
+
+    async def list_jobs(self, status: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[SearchJob]:
+        """List jobs in one status (or all jobs), oldest change first"""
+        return await self._run(self._list, status, limit, offset)
+
+    def _list(self, status: Optional[str], limit: int, offset: int) -> List[SearchJob]:
+        if status is None:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM search_jobs ORDER BY job_id LIMIT ? OFFSET ?", (limit, offset)
+            )
+        else:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM search_jobs WHERE status = ? ORDER BY updated_at, job_id LIMIT ? OFFSET ?",
+                (JobStatus(status).value, limit, offset)
+            )
+        return [_from_sql(row) for row in rows.fetchall()]
+
+    def _get(self, job_id: str, conn: Optional[sqlite3.Connection] = None) -> Optional[SearchJob]:
+        key = _job_key(job_id)
+        if key is None:
+            return None
+        row = (conn or self._conn).execute(f"SELECT {_COLUMNS} FROM search_jobs WHERE job_id = ?", (key,)).fetchone()
+        return _from_sql(row) if row else None
+
+    def _meta(self, conn: sqlite3.Connection, key: str) -> float:
+        row = conn.execute("SELECT value FROM queue_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0.0
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: float) -> None:
+        conn.execute(
+            "INSERT INTO queue_meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def _maybe_sweep(self, conn: sqlite3.Connection, now: float) -> Optional[Swept]:
+        """Remove finished and dead-lettered jobs beyond their limits, at most once a minute per process
+
+        Returns the removed jobs with their finish times for _archive(), which
+        runs after the transaction commits so the write lock isn't held for it.
+        """
+        if now < self._next_sweep:
+            return None
+        self._next_sweep = now + 60
+        rows = self._over_limits(conn, _TERMINAL, self.max_history, now - self.max_history_age)
+        rows += self._over_limits(conn, "('dead_letter')", self.max_dead_letters, now - self.max_dead_letter_age)
+        if not rows:
+            return None
+        jobs = [_from_sql(row[:-1]) for row in rows]
+        conn.executemany("DELETE FROM search_jobs WHERE job_id = ?", [(int(job.job_id),) for job in jobs])
+        self.archived += len(jobs)
+        if self.archive is None:
+            return None
+        for job in jobs:
+            self._archiving[job.job_id] = job
+        return jobs, {job.job_id: row[-1] for job, row in zip(jobs, rows)}
+
+    async def _archive(self, jobs: List[SearchJob], finished_at: Dict[str, float]) -> None:
+        try:
+            await run_db(self.archive.store, jobs, finished_at)
+        except Exception:
+            logger.exception("Archiving %d swept jobs failed", len(jobs))
+        finally:
+            for job in jobs:
+                self._archiving.pop(job.job_id, None)
+
+    @staticmethod
+    def _over_limits(conn: sqlite3.Connection, statuses: str, max_jobs: int, cutoff: float) -> List[Tuple[Any, ...]]:
+        """Rows in `statuses`, with finished_at last, beyond the `max_jobs` newest or finished before `cutoff`"""
+        count = conn.execute(f"SELECT COUNT(*) FROM search_jobs WHERE status IN {statuses}").fetchone()[0]
+        overflow = max(count - max_jobs, 0)
+        return conn.execute(
+            f"SELECT {_COLUMNS}, finished_at FROM search_jobs WHERE status IN {statuses} "
+            f"AND (finished_at < ? OR job_id IN (SELECT job_id FROM search_jobs WHERE status IN {statuses} "
+            f"ORDER BY finished_at LIMIT ?))",
+            (cutoff, overflow)
+        ).fetchall()
+
+    async def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        return await self._run(self._counts)
+
+    def _counts(self) -> Dict[str, int]:
+        counts = {status.value: 0 for status in JobStatus}
+        counts.update(self._conn.execute("SELECT status, COUNT(*) FROM search_jobs GROUP BY status").fetchall())
+        return counts
+
+    def _backlog(self) -> Dict[int, int]:
+        return dict(self._conn.execute(
+            "SELECT instance_id, COUNT(*) FROM search_jobs WHERE status = 'queued' GROUP BY instance_id"
+        ).fetchall())
+
+    async def get_queue_status(self) -> Dict[str, Any]:
+        status: Dict[str, Any] = await self.counts()
+        status.update({
+            "backend": "sqlite",
+            "total_jobs": sum(status.values()),
+            "backlog_by_instance": await self._run(self._backlog),
+            "deduplicated": self.deduplicated,
+            "deferred": self.deferred,
+            "retries_scheduled": self.retries_scheduled,
+            "reclaimed": self.reclaimed,
+            "archived": self.archived
+        })
+        for name, provider in self._stats_providers.items():
+            status[name] = provider()
+        return status
+
+    async def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await self._run(self._get, job_id) or self._archiving.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.archive is not None:
+            return await run_db(self.archive.get, job_id)
+        return None
@@ -5,11 +5,14 @@ from typing import List, Optional, Dict, Any
 # Third-party imports
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-import httpx
 
 # Local application imports
+from app.core.database import run_db
+from app.core.http_client import client_registry
 from app.models.sonarr_instance import SonarrInstance
 from app.schemas.sonarr_instance import SonarrInstanceCreate, SonarrInstanceUpdate
+from app.services.health_monitor import health_monitor
+from app.services.sonarr_service import circuit_breakers, invalidate_instance_cache
 
 class SonarrInstanceService:
     def __init__(self, db: Session):
@@ -24,19 +27,25 @@ class SonarrInstanceService:
             name=instance.name,
             url=str(instance.url),
             api_key=instance.api_key,
+            rate_limit_requests=instance.rate_limit_requests,
+            rate_limit_window=instance.rate_limit_window,
+            queue_weight=instance.queue_weight,
             status="online",
             last_checked=datetime.utcnow()
         )
         self.db.add(db_instance)
-        self.db.commit()
-        self.db.refresh(db_instance)
+        await run_db(self._commit, db_instance)
         return db_instance
 
     async def get_instance(self, instance_id: int) -> Optional[SonarrInstance]:
-        return self.db.query(SonarrInstance).filter(SonarrInstance.id == instance_id).first()
+        return await run_db(self.db.query(SonarrInstance).filter(SonarrInstance.id == instance_id).first)
 
     async def get_all_instances(self) -> List[SonarrInstance]:
-        return self.db.query(SonarrInstance).all()
+        return await run_db(self.db.query(SonarrInstance).all)
+
+    def _commit(self, db_instance: SonarrInstance) -> None:
+        self.db.commit()
+        self.db.refresh(db_instance)
 
     async def update_instance(self, instance_id: int, instance: SonarrInstanceUpdate) -> Optional[SonarrInstance]:
         db_instance = await self.get_instance(instance_id)
@@ -55,9 +64,13 @@ class SonarrInstanceService:
         for key, value in update_data.items():
             setattr(db_instance, key, value)
 
+        if "url" in update_data or "api_key" in update_data:
+            client_registry.invalidate(instance_id)
+            invalidate_instance_cache(instance_id)
+            circuit_breakers.forget(instance_id)
+
         db_instance.last_checked = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(db_instance)
+        await run_db(self._commit, db_instance)
         return db_instance
 
     async def delete_instance(self, instance_id: int) -> bool:
@@ -66,15 +79,19 @@ class SonarrInstanceService:
             return False
 
         self.db.delete(db_instance)
-        self.db.commit()
+        await run_db(self.db.commit)
+        client_registry.invalidate(instance_id)
+        invalidate_instance_cache(instance_id)
+        circuit_breakers.forget(instance_id)
+        health_monitor.forget(instance_id)
         return True
 
     async def _test_connection(self, url: str, api_key: str) -> bool:
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {"X-Api-Key": api_key}
-                response = await client.get(f"{url}/api/v3/system/status", headers=headers)
-                return response.status_code == 200
+            client = client_registry.get_shared_client()
+            headers = {"X-Api-Key": api_key}
+            response = await client.get(f"{url}/api/v3/system/status", headers=headers)
+            return response.status_code == 200
         except Exception:
             return False
 
@@ -83,9 +100,11 @@ class SonarrInstanceService:
         if not db_instance:
             return None
 
-        is_online = await self._test_connection(db_instance.url, db_instance.api_key)
-        db_instance.status = "online" if is_online else "offline"
-        db_instance.last_checked = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(db_instance)
+        health = await health_monitor.probe(db_instance)
+        health_monitor.record(health)
+        db_instance.status = health.status
+        db_instance.error_message = health.error_message
+        db_instance.latency_ms = health.latency_ms
+        db_instance.last_checked = health.last_checked
+        await run_db(self._commit, db_instance)
         return db_instance 
\ No newline at end of file
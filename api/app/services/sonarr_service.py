@@ -1,6 +1,48 @@
-from typing import Dict, Any, List, Optional
+import asyncio
+import time
+from typing import Dict, Any, AsyncIterator, Iterable, List, NamedTuple, Optional
 import httpx
+from app.config import settings
+from app.core.http_client import client_registry
 from app.models.sonarr_instance import SonarrInstance
+from app.utils.cache import TTLCache
+from app.utils.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+from app.utils.json_stream import iter_json_array
+from app.utils.rate_limit import RateLimiter, TokenBucket
+
+# Paces commands sent to each instance; searches fan out to indexers, so reads are not limited
+rate_limiter = RateLimiter(settings.MAX_REQUESTS_PER_WINDOW, settings.RATE_LIM_WINDOW)
+
+def command_bucket(instance: SonarrInstance) -> TokenBucket:
+    """The instance's command bucket in this process
+
+    Buckets are per process, so with WEB_CONCURRENCY processes each one
+    refills over that many windows and together they keep to the limit.
+    """
+    capacity = getattr(instance, "rate_limit_requests", None) or settings.MAX_REQUESTS_PER_WINDOW
+    window = getattr(instance, "rate_limit_window", None) or settings.RATE_LIM_WINDOW
+    return rate_limiter.bucket(instance.id, capacity, window * max(settings.WEB_CONCURRENCY, 1))
+
+# Series and episode lists keyed by (instance_id, ...); cached values are shared, do not mutate them
+sonarr_cache = TTLCache(
+    settings.SONARR_CACHE_MAX_ENTRIES,
+    settings.SONARR_CACHE_TTL,
+    settings.SONARR_CACHE_STALE_TTL
+)
+
+# Fails calls fast while an instance keeps timing out or returning 5xx
+circuit_breakers = CircuitBreakerRegistry(
+    settings.SONARR_CIRCUIT_FAILURE_THRESHOLD,
+    settings.SONARR_CIRCUIT_RESET_TIMEOUT
+)
+
+def invalidate_instance_cache(instance_id: int) -> None:
+    sonarr_cache.invalidate_where(lambda key: key[0] == instance_id)
+
+class EpisodeFetch(NamedTuple):
+    series_id: int
+    episodes: Optional[List[Dict[str, Any]]]
+    error: Optional[Exception] = None
 
 class SonarrService:
     def __init__(self, instance: SonarrInstance):
@@ -8,36 +50,159 @@ class SonarrService:
         self.base_url = instance.url.rstrip('/')
         self.api_key = instance.api_key
         self.headers = {"X-Api-Key": self.api_key}
+        self.last_latency: Optional[float] = None  # seconds taken by the last request that got an answer
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return client_registry.get(self.instance.id, self.base_url, self.api_key)
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return circuit_breakers.get(self.instance.id)
+
+    async def _request(self, method: str, path: str, rate_limited: bool = False, **kwargs) -> httpx.Response:
+        """Send a request through the instance's circuit breaker, raises CircuitOpenError while it is open"""
+        breaker = self.breaker
+        breaker.before_call()
+        try:
+            if rate_limited:
+                await command_bucket(self.instance).acquire()
+            started = time.monotonic()
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.TimeoutException as e:
+            self.last_latency = time.monotonic() - started
+            breaker.record_failure(e)
+            raise
+        except httpx.TransportError as e:
+            breaker.record_failure(e)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        self.last_latency = time.monotonic() - started
+        # Anything below 500 means the instance is up, even if it rejected this request
+        if response.status_code >= 500:
+            breaker.record_failure(f"HTTP {response.status_code} from {path}")
+        else:
+            breaker.record_success()
+        return response
 
-    async def get_series(self) -> List[Dict[str, Any]]:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/api/v3/series", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+    async def get_series(self, use_cache: bool = True) -> List[Dict[str, Any]]:
+        if not use_cache:
+            return await self._fetch_series()
+        return await sonarr_cache.get_or_load((self.instance.id, "series"), self._fetch_series)
 
-    async def get_episodes(self, series_id: int) -> List[Dict[str, Any]]:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/api/v3/episode", headers=self.headers, params={"seriesId": series_id})
-            response.raise_for_status()
-            return response.json()
+    async def iter_series(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield series one at a time while the library downloads, without holding the whole list
+
+        Goes through the circuit breaker like _request, but the outcome is only
+        recorded once the body is read, so a stream cut off midway counts as a failure.
+        """
+        breaker = self.breaker
+        breaker.before_call()
+        recorded = False
+        try:
+            started = time.monotonic()
+            async with self.client.stream("GET", "/api/v3/series") as response:
+                self.last_latency = time.monotonic() - started
+                if response.status_code >= 500:
+                    recorded = True
+                    breaker.record_failure(f"HTTP {response.status_code} from /api/v3/series")
+                elif response.is_error:
+                    recorded = True
+                    breaker.record_success()
+                response.raise_for_status()
+                async for series in iter_json_array(response.aiter_bytes()):
+                    yield series
+            recorded = True
+            breaker.record_success()
+        except httpx.TransportError as e:
+            if not recorded:
+                recorded = True
+                breaker.record_failure(e)
+            raise
+        finally:
+            # Cancelled, abandoned by the consumer or unparseable: says nothing about the instance
+            if not recorded:
+                breaker.release()
+
+    async def get_episodes(self, series_id: int, use_cache: bool = True) -> List[Dict[str, Any]]:
+        if not use_cache:
+            return await self._fetch_episodes(series_id)
+        return await sonarr_cache.get_or_load(
+            (self.instance.id, "episodes", series_id),
+            lambda: self._fetch_episodes(series_id)
+        )
+
+    async def iter_episodes(
+        self,
+        series_ids: Iterable[int],
+        concurrency: Optional[int] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[EpisodeFetch]:
+        """Fetch episodes for many series concurrently, yielding each result as it completes
+
+        At most `concurrency` requests are in flight. A series that fails is
+        yielded with its error instead of aborting the rest of the scan.
+        """
+        concurrency = concurrency or settings.SONARR_FETCH_CONCURRENCY
+        pending = iter(series_ids)
+        # Bounded so a slow consumer pauses the fetchers instead of piling up results
+        results: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+        async def fetcher() -> None:
+            for series_id in pending:
+                try:
+                    episodes = await self.get_episodes(series_id, use_cache=use_cache)
+                except Exception as e:
+                    await results.put(EpisodeFetch(series_id, None, e))
+                else:
+                    await results.put(EpisodeFetch(series_id, episodes))
+            await results.put(None)
+
+        fetchers = [asyncio.create_task(fetcher()) for _ in range(concurrency)]
+        try:
+            running = len(fetchers)
+            while running:
+                result = await results.get()
+                if result is None:
+                    running -= 1
+                else:
+                    yield result
+        finally:
+            for task in fetchers:
+                task.cancel()
+            await asyncio.gather(*fetchers, return_exceptions=True)
+
+    async def _fetch_series(self) -> List[Dict[str, Any]]:
+        response = await self._request("GET", "/api/v3/series")
+        response.raise_for_status()
+        return response.json()
+
+    async def _fetch_episodes(self, series_id: int) -> List[Dict[str, Any]]:
+        response = await self._request("GET", "/api/v3/episode", params={"seriesId": series_id})
+        response.raise_for_status()
+        return response.json()
 
     async def get_episode(self, episode_id: int) -> Optional[Dict[str, Any]]:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/api/v3/episode/{episode_id}", headers=self.headers)
-            if response.status_code == 404:
-                return None
-            response.raise_for_status()
-            return response.json()
+        response = await self._request("GET", f"/api/v3/episode/{episode_id}")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
 
     async def search_episode(self, episode_id: int) -> Dict[str, Any]:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/v3/command",
-                headers=self.headers,
-                json={
-                    "name": "EpisodeSearch",
-                    "episodeIds": [episode_id]
-                }
-            )
-            response.raise_for_status()
-            return response.json() 
\ No newline at end of file
+        return await self.search_episodes([episode_id])
+
+    async def search_episodes(self, episode_ids: List[int]) -> Dict[str, Any]:
+        response = await self._request(
+            "POST",
+            "/api/v3/command",
+            rate_limited=True,
+            json={
+                "name": "EpisodeSearch",
+                "episodeIds": list(episode_ids)
+            }
+        )
+        response.raise_for_status()
+        return response.json()
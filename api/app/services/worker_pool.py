@@ -0,0 +1,282 @@
+# Standard library imports
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third-party imports
+import httpx
+
+# Local application imports
+from app.config import settings
+from app.core.database import SessionLocal, run_db
+from app.models.sonarr_instance import SonarrInstance
+from app.services.queue_service import QueueService
+from app.services.search_job import SearchJob
+from app.services.sonarr_service import SonarrService, circuit_breakers, command_bucket, rate_limiter
+from app.utils.adaptive_limit import AdaptiveLimiter
+from app.utils.circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Lower bound on how long parked jobs wait, so a half-open circuit isn't polled in a tight loop
+MIN_PARK_DELAY = 1.0
+
+def _is_overload(error: Exception) -> bool:
+    # Signals that the instance itself is struggling, as opposed to rejecting the request
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return isinstance(error, httpx.TransportError)
+
+def _is_retryable(error: Exception) -> bool:
+    # Sonarr rejecting the command (4xx) will not change on a retry, timeouts and 5xx might
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return True
+
+class SearchWorkerPool:
+    """Runs queued episode searches against Sonarr with a fixed number of workers
+
+    A worker only claims a job for an instance with a free concurrency slot and
+    a rate limit token, and takes the slot before doing anything else, so jobs
+    for a saturated instance stay in the queue and never hold up the others. It
+    then coalesces that instance's jobs which become ready within a short window
+    into one EpisodeSearch command and fans the result back out to the batch.
+    """
+
+    def __init__(
+        self,
+        queue_service: QueueService,
+        worker_count: Optional[int] = None,
+        per_instance_limit: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        batch_window: Optional[float] = None
+    ):
+        self.queue_service = queue_service
+        self.worker_count = worker_count or settings.SEARCH_WORKERS
+        self.per_instance_limit = per_instance_limit or settings.SEARCH_WORKERS_PER_INSTANCE
+        self.batch_size = batch_size or settings.SEARCH_BATCH_SIZE
+        self.batch_window = settings.SEARCH_BATCH_WINDOW if batch_window is None else batch_window
+        self._tasks: List[asyncio.Task] = []
+        self._limiters: Dict[int, AdaptiveLimiter] = {}
+        self._in_flight: Dict[int, int] = defaultdict(int)
+        self._finished = deque()  # monotonic timestamps of jobs finished in the last minute
+        self._held: Dict[str, None] = {}  # ids of claimed jobs not yet handed back to the queue
+        self.completed = 0
+        self.failed = 0
+        self.commands_sent = 0
+        self.parked = 0
+        self.rate_limited = 0
+        self.retried = 0
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self.queue_service.register_stats("workers", self.stats)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"search-worker-{n}")
+            for n in range(self.worker_count)
+        ]
+        self._tasks.append(asyncio.create_task(self._heartbeat(), name="search-heartbeat"))
+        logger.info("Started %d search workers", self.worker_count)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        self._trim_finished()
+        return {
+            "workers": self.worker_count if self._tasks else 0,
+            "in_flight": sum(self._in_flight.values()),
+            "in_flight_by_instance": {k: v for k, v in self._in_flight.items() if v},
+            "concurrency": {instance_id: limiter.stats() for instance_id, limiter in self._limiters.items()},
+            "jobs_per_minute": len(self._finished),
+            "completed": self.completed,
+            "failed": self.failed,
+            "commands_sent": self.commands_sent,
+            "parked": self.parked,
+            "rate_limited": self.rate_limited,
+            "retried": self.retried
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            instance_id, batch = await self._next_batch()
+            try:
+                await self._run_batch(instance_id, batch)
+            except Exception:
+                logger.exception("Search batch crashed")
+            finally:
+                for job in batch:
+                    self._held.pop(job.job_id, None)
+
+    async def _heartbeat(self) -> None:
+        """Keep leases on claimed jobs alive while they wait for a slot or a slow Sonarr"""
+        interval = settings.QUEUE_VISIBILITY_TIMEOUT / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not self._held:
+                continue
+            try:
+                await self.queue_service.heartbeat(list(self._held))
+            except Exception:
+                logger.exception("Job lease heartbeat failed")
+
+    async def _next_batch(self) -> Tuple[int, List[SearchJob]]:
+        """Claim a job and a slot for its instance, then coalesce more of that instance's jobs"""
+        while True:
+            job = await self.queue_service.wait_for_job(eligible=self._can_dispatch)
+            if self._limiter(job.instance_id).try_acquire():
+                break
+            # Another worker of this process took the last slot while the shared queue claimed
+            await self.queue_service.defer_job(job.job_id, 0)
+        self._held[job.job_id] = None
+        instance_id = job.instance_id
+        batch = [job]
+
+        def same_instance(other: int) -> bool:
+            return other == instance_id
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            job = await self.queue_service.wait_for_job(timeout=remaining, eligible=same_instance)
+            if job is None:
+                break
+            self._held[job.job_id] = None
+            batch.append(job)
+        return instance_id, batch
+
+    def _wake_when_refilled(self, instance_id: int) -> None:
+        # Timers may fire a hair early, so check the bucket again rather than trusting the delay
+        bucket = rate_limiter.peek(instance_id)
+        wait = bucket.wait_time() if bucket is not None else 0.0
+        if wait > 0:
+            asyncio.get_running_loop().call_later(wait, self._wake_when_refilled, instance_id)
+        else:
+            self.queue_service.wake()
+
+    def _can_dispatch(self, instance_id: int) -> bool:
+        """Whether a command could go to the instance now: a free slot and a rate limit token"""
+        # May run on the shared queue's thread, so it only reads
+        limiter = self._limiters.get(instance_id)
+        if limiter is not None and not limiter.available:
+            return False
+        bucket = rate_limiter.peek(instance_id)
+        return bucket is None or bucket.wait_time() == 0
+
+    async def _run_batch(self, instance_id: int, jobs: List[SearchJob]) -> None:
+        """Search a batch for one instance, holding the instance slot _next_batch took"""
+        limiter = self._limiter(instance_id)
+        service = None
+        overloaded = False
+        try:
+            # Don't spend a database read on an instance whose circuit is open
+            breaker = circuit_breakers.get(instance_id)
+            if not breaker.allows_request():
+                await self._park(jobs, breaker.retry_after, breaker.last_error)
+                return
+
+            instance = await run_db(self._load_instance, instance_id)
+            if instance is not None:
+                # Weight edits reach the scheduler the next time the instance gets a batch
+                self.queue_service.set_instance_weight(instance_id, instance.queue_weight)
+            if instance is None or not instance.is_active:
+                # A deleted instance is gone for good, a deactivated one may come back
+                for job in jobs:
+                    await self._fail(job.job_id, f"Sonarr instance {instance_id} is not available", instance is not None)
+                return
+
+            # Keep episodes of the same series next to each other in the command
+            jobs.sort(key=lambda job: (job.series_id or 0, job.episode_id))
+            episode_ids = list(dict.fromkeys(job.episode_id for job in jobs))
+
+            # Claims skip instances without a token, but two workers can claim against the same one and
+            # an instance's first claim comes before its bucket exists: hand the jobs back rather than
+            # hold them and the slot while the bucket refills. Nothing awaits between here and the send
+            wait = command_bucket(instance).wait_time()
+            if wait > 0:
+                for job in jobs:
+                    await self.queue_service.defer_job(job.job_id, wait, "Waiting for a rate limit token")
+                self.rate_limited += len(jobs)
+                return
+
+            service = SonarrService(instance)
+            self._in_flight[instance_id] += len(jobs)
+            try:
+                self.commands_sent += 1
+                result = await service.search_episodes(episode_ids)
+            except CircuitOpenError as e:
+                await self._park(jobs, e.retry_after, str(e))
+                return
+            except Exception as e:
+                overloaded = _is_overload(e)
+                if not breaker.allows_request():
+                    # This failure tripped the circuit; keep the jobs for when the instance recovers
+                    await self._park(jobs, breaker.retry_after, str(e))
+                    return
+                for job in jobs:
+                    await self._fail(job.job_id, str(e), _is_retryable(e))
+                return
+            finally:
+                self._in_flight[instance_id] -= len(jobs)
+
+            for job in jobs:
+                await self.queue_service.complete_job(job.job_id, result)
+                self.completed += 1
+                self._record_finished()
+        finally:
+            # Response time of the command itself, not counting the wait for a rate limit token
+            await limiter.release(service.last_latency if service is not None else None, overloaded)
+            # Workers skip instances without a free slot or token, so let them know once this one
+            # has both again
+            self._wake_when_refilled(instance_id)
+
+    def _limiter(self, instance_id: int) -> AdaptiveLimiter:
+        limiter = self._limiters.get(instance_id)
+        if limiter is None:
+            limiter = self._limiters[instance_id] = AdaptiveLimiter(
+                initial=self.per_instance_limit,
+                min_limit=settings.SEARCH_CONCURRENCY_MIN,
+                max_limit=settings.SEARCH_CONCURRENCY_MAX,
+                latency_target=settings.SEARCH_LATENCY_TARGET
+            )
+        return limiter
+
+    async def _park(self, jobs: List[SearchJob], delay: float, reason: Optional[str]) -> None:
+        """Requeue jobs for an instance whose circuit is open until it lets a trial call through"""
+        delay = max(delay, MIN_PARK_DELAY)
+        for job in jobs:
+            await self.queue_service.defer_job(job.job_id, delay, reason)
+        self.parked += len(jobs)
+
+    async def _fail(self, job_id: str, error: str, retryable: bool = True) -> None:
+        # Retries wait in the queue's delayed heap, so they cost no worker time
+        if await self.queue_service.fail_job(job_id, error, retryable) is not None:
+            self.retried += 1
+            return
+        self.failed += 1
+        self._record_finished()
+
+    def _load_instance(self, instance_id: int) -> Optional[SonarrInstance]:
+        db = SessionLocal()
+        try:
+            return db.query(SonarrInstance).filter(SonarrInstance.id == instance_id).first()
+        finally:
+            db.close()
+
+    def _record_finished(self) -> None:
+        self._finished.append(time.monotonic())
+        self._trim_finished()
+
+    def _trim_finished(self) -> None:
+        cutoff = time.monotonic() - 60
+        while self._finished and self._finished[0] < cutoff:
+            self._finished.popleft()
@@ -0,0 +1,111 @@
+# Standard library imports
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+class AdaptiveLimiter:
+    """Concurrency limit that adapts to how the downstream responds (AIMD)
+
+    Each call that finishes under `latency_target` raises the limit by
+    1/limit, so a full window of fast calls adds one slot. A timeout or
+    server error cuts the limit by `decrease_factor`, at most once per
+    `cooldown` seconds so one burst of failures counts as one signal. Slow
+    but successful calls hold the limit where it is.
+    """
+
+    def __init__(self, initial: int = 2, min_limit: int = 1, max_limit: int = 16,
+                 latency_target: float = 2.0, decrease_factor: float = 0.5,
+                 cooldown: float = 1.0, window: int = 200):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._limit = float(min(max(initial, min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiting = 0
+        self._condition = asyncio.Condition()
+        self._latencies = deque(maxlen=window)  # seconds, most recent calls
+        self._last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def available(self) -> int:
+        """Slots free right now, not counting callers already waiting in acquire()"""
+        return max(self.limit - self._in_flight - self._waiting, 0)
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free right now, without waiting"""
+        if not self.available:
+            return False
+        self._in_flight += 1
+        return True
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            self._waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+
+    async def release(self, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        """Free a slot and feed back how the call went; pass no latency if nothing was measured"""
+        async with self._condition:
+            self._in_flight -= 1
+            if latency is not None:
+                self._latencies.append(latency)
+            if overloaded:
+                self._decrease()
+            elif latency is not None and latency <= self.latency_target:
+                self._increase()
+            free = self.limit - self._in_flight
+            if free > 0:
+                self._condition.notify(free)
+
+    def _increase(self) -> None:
+        before = self.limit
+        self._limit = min(self._limit + 1 / self._limit, float(self.max_limit))
+        if self.limit > before:
+            self.increases += 1
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(self._limit * self.decrease_factor, float(self.min_limit))
+        self.decreases += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def stats(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "latency_p50_ms": ms(self.percentile(0.5)),
+            "latency_p90_ms": ms(self.percentile(0.9)),
+            "latency_p99_ms": ms(self.percentile(0.99)),
+            "samples": len(self._latencies),
+            "increases": self.increases,
+            "decreases": self.decreases
+        }
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Returned by TTLCache.lookup when there is no usable entry
+MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """Size-bounded LRU cache with a TTL and stale-while-revalidate refresh
+
+    Entries younger than `ttl` are served as-is. Entries younger than
+    `ttl + stale_ttl` are still served, but trigger one background reload.
+    Concurrent misses for the same key share a single load.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, stale_ttl: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        value = self.lookup(key, loader)
+        if value is not MISSING:
+            return value
+        task = self._loading.get(key) or self._start_load(key, loader)
+        return await asyncio.shield(task)
+
+    def lookup(self, key: Hashable, loader: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """Return a fresh or stale value without loading, or MISSING
+
+        A stale hit schedules a background reload through `loader` when one is given.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if loader is not None and key not in self._loading:
+                    self._start_load(key, loader).add_done_callback(self._log_refresh_error)
+                return value
+
+        self.misses += 1
+        return MISSING
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "loading": len(self._loading)
+        }
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(self._load(key, loader))
+        # Retrieve the outcome even if every waiter was cancelled, so failures are never left unobserved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._loading[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        try:
+            value = await loader()
+            self.put(key, value)
+            return value
+        finally:
+            self._loading.pop(key, None)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background cache refresh failed: %s", task.exception())
@@ -0,0 +1,149 @@
+# Standard library imports
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, key: Hashable, retry_after: float):
+        super().__init__(f"Circuit for {key} is open, retry in {retry_after:.1f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one dependency
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds. Then up to `half_open_calls` trial
+    calls are let through; a success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(self, key: Hashable, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_calls: int = 1,
+                 on_state_change: Optional[Callable[['CircuitBreaker', CircuitState], None]] = None):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.on_state_change = on_state_change
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self.last_error: Optional[str] = None
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and self.retry_after <= 0:
+            self._set_state(CircuitState.HALF_OPEN)
+        return self._state
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a trial call through"""
+        if self._state != CircuitState.OPEN:
+            return 0.0
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def allows_request(self) -> bool:
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN:
+            return self._trials < self.half_open_calls
+        return False
+
+    def before_call(self) -> None:
+        """Claim permission for one call, raises CircuitOpenError if the circuit rejects it"""
+        if not self.allows_request():
+            self.rejected += 1
+            raise CircuitOpenError(self.key, self.retry_after or self.reset_timeout)
+        if self._state == CircuitState.HALF_OPEN:
+            self._trials += 1
+
+    def release(self) -> None:
+        """Give back a claimed call that ended without telling us anything (e.g. it was cancelled)"""
+        if self._state == CircuitState.HALF_OPEN and self._trials:
+            self._trials -= 1
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self._state != CircuitState.CLOSED:
+            self.last_error = None
+            self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self, error: Any = None) -> None:
+        self._failures += 1
+        if error is not None:
+            self.last_error = str(error) or type(error).__name__
+        if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+            self._set_state(CircuitState.OPEN)
+
+    def _set_state(self, state: CircuitState) -> None:
+        if state == self._state:
+            return
+        self._state = state
+        self._trials = 0
+        if self.on_state_change is not None:
+            self.on_state_change(self, state)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "failures": self._failures,
+            "retry_after": round(self.retry_after, 1),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "last_error": self.last_error
+        }
+
+class CircuitBreakerRegistry:
+    """One CircuitBreaker per key, created on first use"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self._breakers: Dict[Hashable, CircuitBreaker] = {}
+        self._listeners: List[Callable[[CircuitBreaker, CircuitState], None]] = []
+
+    def get(self, key: Hashable) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(
+                key,
+                self.failure_threshold,
+                self.reset_timeout,
+                self.half_open_calls,
+                on_state_change=self._notify
+            )
+        return breaker
+
+    def listen(self, listener: Callable[[CircuitBreaker, CircuitState], None]) -> None:
+        """Call `listener(breaker, new_state)` whenever any circuit changes state"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def forget(self, key: Hashable) -> None:
+        self._breakers.pop(key, None)
+
+    def is_open(self, key: Hashable) -> bool:
+        breaker = self._breakers.get(key)
+        return breaker is not None and breaker.state == CircuitState.OPEN
+
+    def _notify(self, breaker: CircuitBreaker, state: CircuitState) -> None:
+        for listener in self._listeners:
+            listener(breaker, state)
+
+    def stats(self) -> Dict[str, Any]:
+        return {str(key): breaker.stats() for key, breaker in self._breakers.items()}
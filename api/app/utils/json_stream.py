@@ -0,0 +1,56 @@
+import codecs
+import json
+from typing import Any, AsyncIterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",]"
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Yield the elements of a top-level JSON array as its bytes arrive
+
+    Only the unparsed tail of the stream is buffered, so memory stays around one
+    element plus one chunk however large the array is.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+    iterator = chunks.__aiter__()
+
+    while True:
+        # Skip separators between elements
+        while pos < len(buffer) and (buffer[pos] in _WHITESPACE or (started and buffer[pos] == ",")):
+            pos += 1
+
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A bare number or literal is only complete once a delimiter follows it
+                if isinstance(value, (dict, list, str)) or eof or (end < len(buffer) and buffer[end] in _DELIMITERS):
+                    pos = end
+                    yield value
+                    continue
+        elif eof:
+            raise ValueError("Unexpected end of JSON array")
+
+        buffer = buffer[pos:]
+        pos = 0
+        try:
+            buffer += text_decoder.decode(await iterator.__anext__())
+        except StopAsyncIteration:
+            buffer += text_decoder.decode(b"", final=True)
+            eof = True
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+def _validate(capacity: int, window: float) -> None:
+    # Either being zero makes the refill rate zero or infinite
+    if capacity <= 0 or window <= 0:
+        raise ValueError(f"Rate limit needs a positive capacity and window, got {capacity} per {window}s")
+
+class TokenBucket:
+    """Token bucket allowing `capacity` requests per `window` seconds, refilled continuously"""
+
+    def __init__(self, capacity: int, window: float):
+        _validate(capacity, window)
+        self.capacity = float(capacity)
+        self.window = float(window)
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.window
+
+    def configure(self, capacity: int, window: float) -> None:
+        _validate(capacity, window)
+        self._refill()
+        self.capacity = float(capacity)
+        self.window = float(window)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if they are available right now"""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until tokens are available and take them; waiters are served in arrival order"""
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until tokens are available, 0 if they are now; only reads the bucket"""
+        available = min(self.capacity, self.tokens + (time.monotonic() - self._updated) * self.rate)
+        return max(tokens - available, 0.0) / self.rate
+
+    def fill(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+class RateLimiter:
+    """Keeps one token bucket per key, with optional per-key capacity/window overrides
+
+    With `max_keys` set, only that many buckets are kept and the least
+    recently used one is dropped to make room, which bounds memory when keys
+    are open-ended, such as client addresses.
+    """
+
+    def __init__(self, capacity: int, window: float, max_keys: Optional[int] = None):
+        _validate(capacity, window)
+        self.capacity = capacity
+        self.window = window
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self.evicted = 0
+
+    def bucket(self, key: Hashable, capacity: Optional[int] = None, window: Optional[float] = None) -> TokenBucket:
+        capacity = capacity or self.capacity
+        window = window or self.window
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if self.max_keys is not None and len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+            bucket = self._buckets[key] = TokenBucket(capacity, window)
+            return bucket
+        self._buckets.move_to_end(key)
+        if bucket.capacity != capacity or bucket.window != window:
+            bucket.configure(capacity, window)
+        return bucket
+
+    def peek(self, key: Hashable) -> Optional[TokenBucket]:
+        """The bucket for `key` if there is one, without creating it or marking it used"""
+        return self._buckets.get(key)
+
+    async def acquire(self, key: Hashable, capacity: Optional[int] = None, window: Optional[float] = None) -> None:
+        await self.bucket(key, capacity, window).acquire()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            str(key): {
+                "tokens": round(bucket.fill(), 2),
+                "capacity": int(bucket.capacity),
+                "window": bucket.window
+            }
+            for key, bucket in self._buckets.items()
+        }
@@ -1,4 +1,5 @@
 import asyncio
+import random
 from dataclasses import dataclass
 from typing import TypeVar, Callable, Awaitable, Any
 
@@ -15,12 +16,27 @@ class RetryConfig:
     max_delay: float = 60.0
     max_retries: int = 5
     backoff_factor: float = 2.0
+    jitter: bool = False  # spread delays over [delay / 2, delay] so failures don't retry in lockstep
 
 class RetryHandler:
     """Handles retry logic for async operations"""
     
     def __init__(self, config: RetryConfig = None):
         self.config = config or RetryConfig()
+
+    def compute_delay(self, attempt: int) -> float:
+        """Backoff before retry number `attempt` (1-based)"""
+        delay = min(
+            self.config.initial_delay * self.config.backoff_factor ** max(attempt - 1, 0),
+            self.config.max_delay
+        )
+        if self.config.jitter:
+            delay = random.uniform(delay / 2, delay)
+        return delay
+
+    def should_retry(self, retries: int) -> bool:
+        """Whether an operation that has already been retried `retries` times gets another attempt"""
+        return retries < self.config.max_retries
     
     async def execute_with_retry(
         self, 
@@ -41,7 +57,6 @@ class RetryHandler:
             RetryableError: If all retry attempts fail
         """
         retries = 0
-        delay = self.config.initial_delay
         last_error = None
         
         while retries < self.config.max_retries:
@@ -50,14 +65,13 @@ class RetryHandler:
             except RetryableError as e:
                 last_error = e
                 retries += 1
+                delay = self.compute_delay(retries)
                 
                 if on_retry:
                     await on_retry(retries, delay, e)
                 
                 if retries < self.config.max_retries:
                     await asyncio.sleep(delay)
-                    delay = min(delay * self.config.backoff_factor, 
-                              self.config.max_delay)
         
         raise RetryableError(
             f"Operation failed after {retries} retries. Last error: {str(last_error)}"
@@ -0,0 +1,200 @@
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+class JobScheduler:
+    """Priority queue of job ids with not-before times
+
+    Ready jobs are ordered by priority (highest first), then submission order.
+    Delayed jobs wait in a second heap keyed by their not-before time and are
+    promoted once due. Removal is lazy: a heap entry is only honoured if it is
+    still the live entry for its job, so push, pop and discard never rescan.
+    """
+
+    def __init__(self):
+        self._ready: List[Tuple[int, int, str]] = []  # (-priority, seq, job_id)
+        self._delayed: List[Tuple[float, int, int, str]] = []  # (not_before, seq, priority, job_id)
+        self._entries: Dict[str, int] = {}  # job_id -> seq of its live entry
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._entries
+
+    def push(self, job_id: str, priority: int = 0, not_before: float = 0.0) -> None:
+        """Schedule a job, replacing any entry it already has"""
+        seq = next(self._counter)
+        self._entries[job_id] = seq
+        if not_before > time.time():
+            heapq.heappush(self._delayed, (not_before, seq, priority, job_id))
+        else:
+            heapq.heappush(self._ready, (-priority, seq, job_id))
+        self._maybe_compact()
+
+    def discard(self, job_id: str) -> bool:
+        """Remove a job from scheduling, returns False if it was not scheduled"""
+        return self._entries.pop(job_id, None) is not None
+
+    def pop(self, now: Optional[float] = None) -> Optional[str]:
+        """Take the highest-priority job whose not-before time has passed"""
+        self._promote(time.time() if now is None else now)
+        while self._ready:
+            _, seq, job_id = heapq.heappop(self._ready)
+            if self._entries.get(job_id) == seq:
+                del self._entries[job_id]
+                return job_id
+        return None
+
+    def peek_priority(self, now: Optional[float] = None) -> Optional[int]:
+        """Priority of the job pop() would return, None if no job is ready"""
+        self._promote(time.time() if now is None else now)
+        self._drop_stale_ready()
+        return -self._ready[0][0] if self._ready else None
+
+    def next_ready_at(self, now: Optional[float] = None) -> Optional[float]:
+        """Time the next job becomes ready, `now` if one already is, None when empty"""
+        now = time.time() if now is None else now
+        self._promote(now)
+        self._drop_stale_ready()
+        if self._ready:
+            return now
+        while self._delayed and self._entries.get(self._delayed[0][3]) != self._delayed[0][1]:
+            heapq.heappop(self._delayed)
+        return self._delayed[0][0] if self._delayed else None
+
+    def _drop_stale_ready(self) -> None:
+        while self._ready and self._entries.get(self._ready[0][2]) != self._ready[0][1]:
+            heapq.heappop(self._ready)
+
+    def _promote(self, now: float) -> None:
+        while self._delayed and self._delayed[0][0] <= now:
+            _, seq, priority, job_id = heapq.heappop(self._delayed)
+            if self._entries.get(job_id) == seq:
+                heapq.heappush(self._ready, (-priority, seq, job_id))
+
+    def _maybe_compact(self) -> None:
+        # Rescheduled and discarded jobs leave dead entries behind; rebuild once they dominate
+        if len(self._ready) + len(self._delayed) <= 2 * len(self._entries) + 1024:
+            return
+        self._ready = [e for e in self._ready if self._entries.get(e[2]) == e[1]]
+        self._delayed = [e for e in self._delayed if self._entries.get(e[3]) == e[1]]
+        heapq.heapify(self._ready)
+        heapq.heapify(self._delayed)
+
+# Keeps a tiny weight from spinning the ring many times before a key earns one dispatch
+MIN_WEIGHT = 0.1
+
+class FairScheduler:
+    """Weighted fair queuing of job ids across keys (Sonarr instances), under priority
+
+    Every key has its own JobScheduler. pop() first finds the highest ready
+    priority over all keys, so priority still wins across keys. Among the keys
+    whose next job has that priority it picks by deficit round robin: a key
+    earns its weight in credit each time the ring reaches it and spends one
+    credit per job. A key with weight 2 gets about twice the dispatches of a
+    key with weight 1, and a backlogged key waits at most one round of the
+    ring (the sum of the other keys' weights, rounded up) for its next turn,
+    however long the other backlogs are. Each pop scans the keys once, so it
+    costs O(keys + log jobs).
+    """
+
+    def __init__(self, default_weight: float = 1.0):
+        self.default_weight = default_weight
+        self._queues: Dict[Hashable, JobScheduler] = {}
+        self._keys: Dict[str, Hashable] = {}  # job_id -> key of the queue holding it
+        self._weights: Dict[Hashable, float] = {}
+        self._deficit: Dict[Hashable, float] = {}
+        self._ring: Deque[Hashable] = deque()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._keys
+
+    def set_weight(self, key: Hashable, weight: Optional[float]) -> None:
+        if weight is None:
+            self._weights.pop(key, None)
+        else:
+            self._weights[key] = max(weight, MIN_WEIGHT)
+
+    def weight(self, key: Hashable) -> float:
+        return self._weights.get(key, self.default_weight)
+
+    def push(self, job_id: str, key: Hashable, priority: int = 0, not_before: float = 0.0) -> None:
+        """Schedule a job under `key`, replacing any entry it already has"""
+        previous = self._keys.get(job_id)
+        if previous is not None and previous != key:
+            self.discard(job_id)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = JobScheduler()
+            self._deficit[key] = 0.0
+            self._ring.append(key)
+        queue.push(job_id, priority=priority, not_before=not_before)
+        self._keys[job_id] = key
+
+    def discard(self, job_id: str) -> bool:
+        key = self._keys.pop(job_id, None)
+        if key is None:
+            return False
+        queue = self._queues[key]
+        queue.discard(job_id)
+        if not len(queue):
+            self._remove(key)
+        return True
+
+    def pop(self, now: Optional[float] = None,
+            eligible: Optional[Callable[[Hashable], bool]] = None) -> Optional[str]:
+        """Take the next job, only from keys `eligible` accepts when it is given"""
+        now = time.time() if now is None else now
+        heads = {}
+        for key, queue in self._queues.items():
+            if eligible is not None and not eligible(key):
+                continue
+            priority = queue.peek_priority(now)
+            if priority is not None:
+                heads[key] = priority
+        if not heads:
+            return None
+        top = max(heads.values())
+
+        while True:
+            key = self._ring[0]
+            if heads.get(key) != top:
+                self._ring.rotate(-1)
+                continue
+            if self._deficit[key] < 1:
+                self._deficit[key] += self.weight(key)
+                if self._deficit[key] < 1:
+                    self._ring.rotate(-1)
+                    continue
+            self._deficit[key] -= 1
+            job_id = self._queues[key].pop(now)
+            del self._keys[job_id]
+            if not len(self._queues[key]):
+                self._remove(key)
+            elif self._deficit[key] < 1:
+                self._ring.rotate(-1)
+            return job_id
+
+    def next_ready_at(self, now: Optional[float] = None,
+                      eligible: Optional[Callable[[Hashable], bool]] = None) -> Optional[float]:
+        now = time.time() if now is None else now
+        queues = [q for key, q in self._queues.items() if eligible is None or eligible(key)]
+        times = [t for t in (queue.next_ready_at(now) for queue in queues) if t is not None]
+        return min(times) if times else None
+
+    def backlog(self) -> Dict[Hashable, int]:
+        """Scheduled job count per key"""
+        return {key: len(queue) for key, queue in self._queues.items()}
+
+    def _remove(self, key: Hashable) -> None:
+        # An idle key loses its queue and any unspent credit, as in plain DRR
+        del self._queues[key]
+        del self._deficit[key]
+        self._ring.remove(key)
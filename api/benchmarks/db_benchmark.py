@@ -0,0 +1,125 @@
+"""Read/write throughput of the SQLite profile against SQLAlchemy's defaults
+
+Runs reader and writer threads against a scratch database for a few seconds,
+the way the database thread pool serves concurrent API requests, once with
+the engine options the app used before (rollback journal, no pragmas) and
+once with create_db_engine. Run from the api directory:
+
+    python -m benchmarks.db_benchmark --readers 4 --writers 2 --seconds 5
+"""
+# Standard library imports
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+# Third-party imports
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+# Local application imports
+from app.core.database import Base, create_db_engine
+from app.models.archived_job import ArchivedJob
+
+SEED_ROWS = 20000
+
+def _baseline_engine(url: str) -> Engine:
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+def _seed(engine: Engine) -> None:
+    Base.metadata.create_all(bind=engine)
+    rows = [
+        {
+            "job_id": str(i),
+            "instance_id": i % 10,
+            "episode_id": i,
+            "status": "completed",
+            "finished_at": time.time(),
+            "data": json.dumps({"job_id": str(i), "status": "completed"})
+        }
+        for i in range(SEED_ROWS)
+    ]
+    with engine.begin() as conn:
+        conn.execute(ArchivedJob.__table__.insert(), rows)
+
+def _run(engine: Engine, readers: int, writers: int, seconds: float) -> Dict[str, Any]:
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    stop = time.monotonic() + seconds
+    latencies: Dict[str, List[float]] = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    lock = threading.Lock()
+    next_id = iter(range(SEED_ROWS, 10 ** 9))
+
+    def read(db) -> None:
+        job_id = str(int(time.monotonic() * 1e6) % SEED_ROWS)
+        db.query(ArchivedJob).filter(ArchivedJob.job_id == job_id).first()
+        db.query(ArchivedJob).filter(ArchivedJob.instance_id == 3).order_by(ArchivedJob.finished_at.desc()).limit(50).all()
+
+    def write(db) -> None:
+        with lock:
+            job_id = str(next(next_id))
+        db.add(ArchivedJob(job_id=job_id, instance_id=1, episode_id=1, status="completed",
+                           finished_at=time.time(), data="{}"))
+        db.commit()
+
+    def worker(kind: str, operation: Callable) -> None:
+        samples = []
+        failed = 0
+        while time.monotonic() < stop:
+            db = Session()
+            started = time.perf_counter()
+            try:
+                operation(db)
+                samples.append(time.perf_counter() - started)
+            except OperationalError:
+                # "database is locked" once the default 5s busy wait runs out
+                db.rollback()
+                failed += 1
+            finally:
+                db.close()
+        with lock:
+            latencies[kind].extend(samples)
+            errors[kind] += failed
+
+    threads = [threading.Thread(target=worker, args=("read", read)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=("write", write)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {}
+    for kind, samples in latencies.items():
+        ordered = sorted(samples)
+        report[kind] = {
+            "ops_per_sec": round(len(samples) / seconds, 1),
+            "p50_ms": round(statistics.median(ordered) * 1000, 2) if ordered else None,
+            "p99_ms": round(ordered[int(len(ordered) * 0.99)] * 1000, 2) if ordered else None,
+            "errors": errors[kind]
+        }
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for name, build in (("default", _baseline_engine), ("tuned", create_db_engine)):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = build(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+            _seed(engine)
+            report = _run(engine, args.readers, args.writers, args.seconds)
+            engine.dispose()
+        print(f"{name:8} read  {report['read']}")
+        print(f"{name:8} write {report['write']}")
+
+if __name__ == "__main__":
+    main()
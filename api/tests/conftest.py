@@ -0,0 +1,6 @@
+# Standard library imports
+import os
+
+# Settings are read on import and the admin credentials have no default
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_PASSWORD", "admin")
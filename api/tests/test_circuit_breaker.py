@@ -0,0 +1,62 @@
+# Third-party imports
+import pytest
+
+# Local application imports
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure(TimeoutError("slow"))
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("sonarr", failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # resets the streak
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+def test_half_open_trial_closes_on_success():
+    breaker = CircuitBreaker("sonarr", failure_threshold=2, reset_timeout=0)
+    _open(breaker)
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.before_call()
+    # One trial at a time
+    assert not breaker.allows_request()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.last_error is None
+
+def test_half_open_trial_failure_reopens():
+    breaker = CircuitBreaker("sonarr", failure_threshold=2, reset_timeout=0)
+    _open(breaker)
+    breaker.before_call()
+    breaker.reset_timeout = 60
+    breaker.record_failure(TimeoutError("still slow"))
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.last_error == "still slow"
+    assert breaker.times_opened == 2
+
+def test_released_trial_lets_another_through():
+    breaker = CircuitBreaker("sonarr", failure_threshold=1, reset_timeout=0)
+    _open(breaker)
+    breaker.before_call()
+    breaker.release()
+    assert breaker.allows_request()
+
+def test_state_changes_are_reported():
+    changes = []
+    breaker = CircuitBreaker("sonarr", failure_threshold=1, reset_timeout=0,
+                             on_state_change=lambda b, state: changes.append(state))
+    _open(breaker)
+    breaker.before_call()
+    breaker.record_success()
+    assert changes == [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED]
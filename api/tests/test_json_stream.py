@@ -0,0 +1,51 @@
+# Standard library imports
+import asyncio
+import json
+from typing import Any, AsyncIterator, List
+
+# Third-party imports
+import pytest
+
+# Local application imports
+from app.utils.json_stream import iter_json_array
+
+DOCUMENT = [
+    {"id": 1, "title": "Café – naïve ✓", "tags": [1, 2, {"nested": "]"}]},
+    12345,
+    -0.5e3,
+    "a, string] with delimiters",
+    True,
+    None,
+    [],
+]
+
+async def _chunks(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def _parse(data: bytes, size: int) -> List[Any]:
+    async def run() -> List[Any]:
+        return [value async for value in iter_json_array(_chunks(data, size))]
+
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+def test_any_chunk_boundary(size):
+    # Chunks split numbers, strings and multi-byte characters at every possible offset
+    data = json.dumps(DOCUMENT, ensure_ascii=False, indent=1).encode()
+    assert _parse(data, size) == DOCUMENT
+
+def test_number_at_end_of_chunk_is_not_cut_short():
+    assert _parse(b"[123,456]", 2) == [123, 456]
+    assert _parse(b"[1.5e10]", 3) == [1.5e10]
+
+def test_empty_array():
+    assert _parse(b"  [ ]  ", 1) == []
+
+def test_not_an_array():
+    with pytest.raises(ValueError):
+        _parse(b'{"id": 1}', 4)
+
+def test_truncated_array():
+    with pytest.raises(ValueError):
+        _parse(b'[{"id": 1}, {"id"', 4)
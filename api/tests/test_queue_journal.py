@@ -0,0 +1,90 @@
+# Standard library imports
+import asyncio
+
+# Third-party imports
+import pytest
+
+# Local application imports
+from app.services.queue_journal import QueueJournal
+from app.services.search_job import JobStatus, SearchJob
+
+def _job(job_id: str, episode_id: int) -> SearchJob:
+    return SearchJob(job_id=job_id, instance_id=1, episode_id=episode_id)
+
+def _crash(journal: QueueJournal) -> None:
+    # Stop without the final snapshot close() writes, as a killed process would
+    journal._task.cancel()
+    journal._file.close()
+
+def test_snapshot_then_tail_replay(tmp_path):
+    jobs = {"1": _job("1", 10), "2": _job("2", 20)}
+
+    async def run() -> None:
+        journal = QueueJournal(str(tmp_path), flush_interval=3600, snapshot_every=10 ** 6)
+        journal.start(lambda: [job.to_row() for job in jobs.values()])
+        for job in jobs.values():
+            journal.put(job)
+        await journal.snapshot()
+
+        # Only in the segment written after the snapshot
+        jobs["1"].status = JobStatus.COMPLETED
+        journal.put(jobs["1"])
+        del jobs["2"]
+        journal.delete("2")
+        jobs["3"] = _job("3", 30)
+        journal.put(jobs["3"])
+        await journal.flush()
+        _crash(journal)
+
+    asyncio.run(run())
+    restored = {job.job_id: job for job in QueueJournal(str(tmp_path)).load()}
+    assert sorted(restored) == ["1", "3"]
+    assert restored["1"].status == JobStatus.COMPLETED
+    assert restored["3"].episode_id == 30
+
+def test_torn_line_is_skipped(tmp_path):
+    async def run() -> None:
+        journal = QueueJournal(str(tmp_path), flush_interval=3600)
+        journal.start(lambda: [])
+        journal.put(_job("1", 10))
+        await journal.flush()
+        segment = journal._segment_path(journal._segment)
+        _crash(journal)
+        # A batch cut off mid-write by the crash
+        with open(segment, "ab") as f:
+            f.write(b'{"put":[["2",1,20')
+
+    asyncio.run(run())
+    assert [job.job_id for job in QueueJournal(str(tmp_path)).load()] == ["1"]
+
+def test_failed_flush_is_retried(tmp_path, monkeypatch):
+    write = QueueJournal._write
+    calls = []
+
+    def failing_write(file, rows, deleted, torn=False):
+        calls.append(torn)
+        if len(calls) == 1:
+            # Half a line reaches the file before the error
+            file.write(b'{"put":[')
+            file.flush()
+            raise OSError("disk full")
+        write(file, rows, deleted, torn)
+
+    monkeypatch.setattr(QueueJournal, "_write", staticmethod(failing_write))
+
+    async def run() -> None:
+        journal = QueueJournal(str(tmp_path), flush_interval=3600)
+        journal.start(lambda: [])
+        journal.put(_job("1", 10))
+        journal.put(_job("3", 30))
+        with pytest.raises(OSError):
+            await journal.flush()
+        # Marked after the failure, so it must not be replaced by the older dirty entry
+        journal.delete("1")
+        journal.put(_job("2", 20))
+        await journal.flush()
+        _crash(journal)
+
+    asyncio.run(run())
+    assert calls == [False, True]
+    assert sorted(job.job_id for job in QueueJournal(str(tmp_path)).load()) == ["2", "3"]
@@ -0,0 +1,112 @@
+# Standard library imports
+import asyncio
+import time
+
+# Local application imports
+from app.services.queue_service import QueueService
+from app.services.search_job import JobStatus
+from app.utils.retry import RetryConfig
+
+def _queue(max_retries: int = 1) -> QueueService:
+    return QueueService(retry_config=RetryConfig(initial_delay=0, max_delay=0, max_retries=max_retries))
+
+def test_wait_for_job_times_out_on_empty_queue():
+    async def run() -> None:
+        started = time.monotonic()
+        assert await _queue().wait_for_job(timeout=0.05) is None
+        assert 0.05 <= time.monotonic() - started < 1
+
+    asyncio.run(run())
+
+def test_wait_for_job_wakes_when_a_job_is_added():
+    async def run() -> None:
+        queue = _queue()
+        waiter = asyncio.ensure_future(queue.wait_for_job(timeout=5))
+        await asyncio.sleep(0.01)
+        job_id = await queue.add_search({"instance_id": 1, "episode_id": 10})
+        job = await asyncio.wait_for(waiter, 1)
+        assert job.job_id == job_id
+        assert job.status == JobStatus.PROCESSING
+
+    asyncio.run(run())
+
+def test_wait_for_job_leaves_ineligible_instances_queued():
+    async def run() -> None:
+        queue = _queue()
+        await queue.add_searches([{"instance_id": 1, "episode_id": 10}, {"instance_id": 2, "episode_id": 20}])
+        open_instances = {2}
+
+        job = await queue.wait_for_job(timeout=0.05, eligible=open_instances.__contains__)
+        assert job.instance_id == 2
+        # Only a job of a closed instance is left, so the wait runs out instead of claiming it
+        assert await queue.wait_for_job(timeout=0.05, eligible=open_instances.__contains__) is None
+
+        waiter = asyncio.ensure_future(queue.wait_for_job(timeout=5, eligible=open_instances.__contains__))
+        await asyncio.sleep(0.01)
+        open_instances.add(1)
+        queue.wake()
+        assert (await asyncio.wait_for(waiter, 1)).instance_id == 1
+
+    asyncio.run(run())
+
+def test_duplicate_episode_merges_into_the_active_job():
+    async def run() -> None:
+        queue = _queue()
+        first = await queue.add_search({"instance_id": 1, "episode_id": 10})
+        again = await queue.add_search({"instance_id": 1, "episode_id": 10, "priority": 5})
+        assert again == first
+        assert queue.deduplicated == 1
+        assert queue.jobs[first].priority == 5
+
+        # A running search covers the duplicate too
+        await queue.get_next_job()
+        assert await queue.add_search({"instance_id": 1, "episode_id": 10}) == first
+
+    asyncio.run(run())
+
+def test_cancel_frees_the_episode():
+    async def run() -> None:
+        queue = _queue()
+        job_id = await queue.add_search({"instance_id": 1, "episode_id": 10})
+        assert await queue.cancel_job(job_id)
+        assert queue.jobs[job_id].status == JobStatus.CANCELLED
+        assert await queue.get_next_job() is None
+        assert not await queue.cancel_job(job_id)
+        assert await queue.add_search({"instance_id": 1, "episode_id": 10}) != job_id
+
+    asyncio.run(run())
+
+def test_retry_then_dead_letter_then_requeue():
+    async def run() -> None:
+        queue = _queue(max_retries=1)
+        job_id = await queue.add_search({"instance_id": 1, "episode_id": 10})
+
+        await queue.get_next_job()
+        assert await queue.fail_job(job_id, "timeout") == 0
+        assert queue.jobs[job_id].status == JobStatus.QUEUED
+        assert queue.jobs[job_id].retry_count == 1
+
+        await queue.get_next_job()
+        assert await queue.fail_job(job_id, "timeout") is None
+        assert queue.jobs[job_id].status == JobStatus.DEAD_LETTER
+        # Dead-lettered jobs no longer hold the episode
+        other = await queue.add_search({"instance_id": 1, "episode_id": 10})
+        assert await queue.cancel_job(other)
+
+        assert await queue.requeue_dead_letters() == [job_id]
+        job = await queue.get_next_job()
+        assert job.job_id == job_id
+        assert job.retry_count == 0
+
+    asyncio.run(run())
+
+def test_non_retryable_failure_is_final():
+    async def run() -> None:
+        queue = _queue()
+        job_id = await queue.add_search({"instance_id": 1, "episode_id": 10})
+        await queue.get_next_job()
+        assert await queue.fail_job(job_id, "HTTP 400", retryable=False) is None
+        assert queue.jobs[job_id].status == JobStatus.FAILED
+        assert await queue.requeue_dead_letters() == []
+
+    asyncio.run(run())
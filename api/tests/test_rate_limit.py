@@ -0,0 +1,81 @@
+# Standard library imports
+import asyncio
+import time
+
+# Third-party imports
+import pytest
+
+# Local application imports
+from app.utils.adaptive_limit import AdaptiveLimiter
+from app.utils.rate_limit import RateLimiter, TokenBucket
+
+def test_bucket_spends_then_refills():
+    bucket = TokenBucket(2, 0.1)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert 0 < bucket.wait_time() <= 0.05
+    time.sleep(0.06)
+    assert bucket.wait_time() == 0
+    assert bucket.try_acquire()
+
+def test_bucket_acquire_waits_for_a_token():
+    async def run() -> float:
+        bucket = TokenBucket(1, 0.1)
+        await bucket.acquire()
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    assert 0.08 <= asyncio.run(run()) < 0.5
+
+def test_bucket_rejects_zero_limits():
+    with pytest.raises(ValueError):
+        TokenBucket(0, 1)
+    with pytest.raises(ValueError):
+        TokenBucket(1, 0)
+
+def test_limiter_evicts_least_recently_used_key():
+    limiter = RateLimiter(1, 60, max_keys=2)
+    limiter.bucket("a").try_acquire()
+    limiter.bucket("b")
+    limiter.bucket("a")  # now most recently used
+    limiter.bucket("c")
+    assert limiter.peek("b") is None
+    assert limiter.peek("a").wait_time() > 0
+    assert limiter.evicted == 1
+
+def test_limiter_applies_per_key_overrides():
+    limiter = RateLimiter(100, 60)
+    assert limiter.bucket("a", 5, 10).capacity == 5
+    assert limiter.bucket("a").capacity == 100
+
+def test_adaptive_limit_grows_on_fast_calls_and_halves_on_overload():
+    async def run() -> None:
+        limiter = AdaptiveLimiter(initial=2, min_limit=1, max_limit=8, latency_target=1.0, cooldown=0)
+        for _ in range(10):
+            assert limiter.try_acquire()
+            await limiter.release(0.01)
+        assert limiter.limit > 2
+
+        before = limiter.limit
+        assert limiter.try_acquire()
+        await limiter.release(0.01, overloaded=True)
+        assert limiter.limit == max(before // 2, 1)
+
+    asyncio.run(run())
+
+def test_adaptive_limit_slots():
+    async def run() -> None:
+        limiter = AdaptiveLimiter(initial=1, min_limit=1, max_limit=1)
+        assert limiter.try_acquire()
+        assert limiter.available == 0
+        assert not limiter.try_acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await limiter.release()
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(run())
@@ -0,0 +1,67 @@
+# Local application imports
+from app.utils.scheduler import FairScheduler, JobScheduler
+
+def _drain(scheduler, now: float = 0.0):
+    popped = []
+    while True:
+        job_id = scheduler.pop(now)
+        if job_id is None:
+            return popped
+        popped.append(job_id)
+
+def test_priority_then_submission_order():
+    scheduler = JobScheduler()
+    scheduler.push("low", priority=0)
+    scheduler.push("high", priority=5)
+    scheduler.push("low2", priority=0)
+    assert _drain(scheduler, now=1.0) == ["high", "low", "low2"]
+
+def test_delayed_job_waits_for_its_time():
+    scheduler = JobScheduler()
+    scheduler.push("later", not_before=10 ** 10)
+    scheduler.push("now")
+    assert scheduler.pop() == "now"
+    assert scheduler.pop() is None
+    assert scheduler.next_ready_at(now=1.0) == 10 ** 10
+    assert scheduler.pop(now=10 ** 10) == "later"
+
+def test_discard_and_reschedule():
+    scheduler = JobScheduler()
+    scheduler.push("a", priority=0)
+    scheduler.push("b", priority=0)
+    scheduler.push("a", priority=9)  # replaces the first entry
+    assert scheduler.discard("b")
+    assert not scheduler.discard("b")
+    assert _drain(scheduler, now=1.0) == ["a"]
+
+def test_priority_wins_across_keys():
+    scheduler = FairScheduler()
+    for n in range(3):
+        scheduler.push(f"a{n}", "a")
+    scheduler.push("b-urgent", "b", priority=10)
+    assert scheduler.pop() == "b-urgent"
+
+def test_weights_share_dispatches():
+    scheduler = FairScheduler()
+    scheduler.set_weight("a", 2)
+    for n in range(60):
+        scheduler.push(f"a{n}", "a")
+        scheduler.push(f"b{n}", "b")
+    first = [scheduler.pop() for _ in range(30)]
+    assert sum(job_id.startswith("a") for job_id in first) == 20
+
+def test_backlogged_key_is_not_starved():
+    scheduler = FairScheduler()
+    for n in range(1000):
+        scheduler.push(f"a{n}", "a")
+    scheduler.push("b0", "b")
+    assert "b0" in [scheduler.pop() for _ in range(2)]
+
+def test_ineligible_keys_are_skipped():
+    scheduler = FairScheduler()
+    scheduler.push("a0", "a")
+    scheduler.push("b0", "b", not_before=10 ** 10)
+    assert scheduler.pop(eligible=lambda key: key == "b") is None
+    assert scheduler.next_ready_at(now=1.0, eligible=lambda key: key == "b") == 10 ** 10
+    assert scheduler.pop(eligible=lambda key: key == "a") == "a0"
+    assert scheduler.backlog() == {"b": 1}